@@ -0,0 +1,95 @@
+"""
+Synthetic corpus generator for the timexy benchmarks.
+
+Documents are made of filler words with dates formatted by the patterns of the
+language's rules and durations built from its units and number words mixed in.
+"""
+
+import datetime as dt
+import random
+import re
+from typing import List
+
+from timexy.language import Language, load_language
+
+FILLER_WORDS = {
+    "de": "der die und in zu den das nicht von sie ist des sich mit dem dass er es "
+    "ein ich auf so eine auch als an nach wie im für man aber aus durch wenn nur "
+    "war noch werden bei hat wir was wird sein einen welche sind oder zur um haben",
+    "en": "the of and to in is you that it he was for on are as with his they at "
+    "be this have from or one had by word but not what all were we when your can "
+    "said there use an each which she do how their if will up other about out",
+    "fr": "le de un être et à il avoir ne je son que se qui ce dans en du elle au "
+    "pour pas que vous par sur faire plus dire me on mon lui nous comme mais "
+    "pouvoir avec tout y aller voir en bien où sans tu ou leur homme si deux",
+}
+
+_DIRECTIVE_RE = re.compile("%(.)")
+
+
+def format_date(
+    rng: random.Random, timexy_lang: Language, pattern: str, date: dt.date
+) -> str:
+    """
+    Format the date with a rule pattern, using the language's month strings for
+    %b and %B.
+    """
+
+    def directive(m: re.Match) -> str:
+        d = m.group(1)
+        if d in "bB":
+            return rng.choice(timexy_lang.months[date.month - 1])
+        return date.strftime(f"%{d}")
+
+    return _DIRECTIVE_RE.sub(directive, pattern)
+
+
+def format_duration(rng: random.Random, timexy_lang: Language) -> str:
+    """
+    Return a duration of a count (digits or a number word) and a unit.
+    """
+    unit = rng.choice(rng.choice(list(timexy_lang.units.values())))
+    if rng.random() < 0.5:
+        return f"{rng.randint(1, 99)} {unit}"
+    return f"{rng.choice(timexy_lang.num_words[1:])} {unit}"
+
+
+def generate_corpus(
+    lang: str,
+    n_docs: int = 1000,
+    doc_len: int = 100,
+    date_density: float = 0.02,
+    duration_mix: float = 0.3,
+    seed: int = 0,
+) -> List[str]:
+    """
+    Generate n_docs texts of about doc_len words each.
+
+    lang: language of the texts and rules
+    date_density: probability of a temporal expression in place of a filler word
+    duration_mix: share of durations among the temporal expressions
+    seed: seed of the random generator, the same arguments yield the same corpus
+    """
+    rng = random.Random(seed)
+    timexy_lang = load_language(lang)
+    words = FILLER_WORDS[lang].split()
+    patterns = [rule.pattern for rule in timexy_lang.rules]
+    min_date, max_date = (
+        dt.date(1970, 1, 1).toordinal(),
+        dt.date(2068, 12, 31).toordinal(),
+    )
+
+    texts = []
+    for _ in range(n_docs):
+        tokens = []
+        for _ in range(doc_len):
+            if rng.random() >= date_density:
+                tokens.append(rng.choice(words))
+            elif rng.random() < duration_mix:
+                tokens.append(format_duration(rng, timexy_lang))
+            else:
+                date = dt.date.fromordinal(rng.randint(min_date, max_date))
+                tokens.append(format_date(rng, timexy_lang, rng.choice(patterns), date))
+        # end with a filler word, "2023." is a single token in some languages
+        texts.append(" ".join(tokens) + f" {rng.choice(words)}.")
+    return texts
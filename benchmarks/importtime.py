@@ -0,0 +1,95 @@
+"""
+Import-time benchmark of timexy.
+
+Runs each statement in a fresh interpreter with ``python -X importtime`` and
+reports the cumulative import time of the timexy modules in milliseconds (best of
+--repeat runs). Results can be saved as a JSON baseline and compared with it:
+
+    python benchmarks/importtime.py --save benchmarks/importtime.json
+    python benchmarks/importtime.py --compare benchmarks/importtime.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict
+
+STATEMENTS = {
+    "import timexy": "import timexy",
+    "from timexy import Timexy": "from timexy import Timexy",
+    "load_language('en')": "from timexy.language import load_language; load_language('en')",
+}
+
+
+def import_time(statement: str) -> float:
+    """
+    Return the cumulative import time of the statement in milliseconds, i.e. of
+    all top-level imports from the first timexy module on, which excludes the
+    imports of the interpreter startup.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    started = False
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, package = line[len("import time:") :].split("|")
+        started = started or package.startswith(" timexy")
+        if started and not package.startswith("  "):  # top-level imports only
+            total_us += int(cumulative)
+    return total_us / 1000
+
+
+def run(repeat: int) -> Dict[str, float]:
+    return {
+        name: min(import_time(statement) for _ in range(repeat))
+        for name, statement in STATEMENTS.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results with this JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="relative slowdown reported as a regression when comparing",
+    )
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    regressions = []
+    for name, ms in results.items():
+        line = f"{name:<28} {ms:9.1f} ms"
+        if name in baseline:
+            change = ms / baseline[name] - 1
+            line += f"  ({change:+.0%} vs. {baseline[name]:.1f} ms)"
+            # ignore sub-millisecond jitter of the cheap statements
+            if change > args.tolerance and ms - baseline[name] > 1:
+                regressions.append(name)
+        print(line)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if regressions:
+        sys.exit(f"Import time regressed for: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
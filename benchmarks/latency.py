@@ -0,0 +1,177 @@
+"""
+Latency benchmark of the async facades of timexy under concurrent load.
+
+Concurrent clients send single texts of a synthetic corpus to an AsyncPipeline
+with timexy or an AsyncExtractor (each client sends its next text as soon as the
+previous one is done) and the p50/p99 latency and requests/sec are measured for
+the thread and the process pool. Results can be saved as a JSON baseline and
+compared with it:
+
+    python benchmarks/latency.py --save benchmarks/latency.json
+    python benchmarks/latency.py --compare benchmarks/latency.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from typing import Any, Callable, Dict, List, Union
+
+import spacy
+from corpus import generate_corpus
+
+from timexy import AsyncExtractor, AsyncPipeline, Timexy  # noqa: F401
+
+FACADES = ["pipeline", "extractor"]
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def measure(
+    facade: Union[AsyncPipeline, AsyncExtractor], texts: List[str], concurrency: int
+) -> Dict[str, float]:
+    # start the workers and compile the rules before measuring
+    await asyncio.gather(*(facade(text) for text in texts[:concurrency]))
+
+    latencies: List[float] = []
+    next_idx = 0
+
+    async def client() -> None:
+        nonlocal next_idx
+        while next_idx < len(texts):
+            text = texts[next_idx]
+            next_idx += 1
+            start = time.perf_counter()
+            await facade(text)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    return {
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "requests_per_sec": round(len(texts) / seconds, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    texts = generate_corpus(
+        args.lang,
+        n_docs=args.n_requests,
+        doc_len=args.doc_len,
+        date_density=args.date_density,
+        duration_mix=0.3,
+    )
+    nlp = spacy.blank(args.lang)
+    nlp.add_pipe("timexy")
+    create: Dict[str, Callable[..., Union[AsyncPipeline, AsyncExtractor]]] = {
+        "pipeline": lambda **kwargs: AsyncPipeline(nlp, **kwargs),
+        "extractor": lambda **kwargs: AsyncExtractor(args.lang, **kwargs),
+    }
+    results = {}
+    for facade in FACADES:
+        for executor in args.executors:
+            for concurrency in args.concurrency:
+                async with create[facade](
+                    executor=executor,
+                    max_workers=args.max_workers,
+                    max_batch_size=args.max_batch_size,
+                    max_delay=args.max_delay,
+                ) as instance:
+                    results[f"{facade}/{executor}/c{concurrency}"] = await measure(
+                        instance, texts, concurrency
+                    )
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    Print the results next to the baseline and return the regressed benchmarks.
+    """
+    regressions = []
+    print(f"{'benchmark':<24} {'p50 ms':>8} {'p99 ms':>8} {'requests/sec':>13}")
+    for name, result in results.items():
+        line = (
+            f"{name:<24} {result['p50_ms']:8.2f} {result['p99_ms']:8.2f} "
+            f"{result['requests_per_sec']:13.0f}"
+        )
+        if name in baseline:
+            change = result["p99_ms"] / baseline[name]["p99_ms"] - 1
+            line += f"  (p99 {change:+.0%} vs. {baseline[name]['p99_ms']:.2f})"
+            if change > tolerance:
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--n-requests", type=int, default=2000)
+    parser.add_argument("--doc-len", type=int, default=100, help="words per doc")
+    parser.add_argument(
+        "--date-density",
+        type=float,
+        default=0.02,
+        help="probability of a temporal expression per word",
+    )
+    parser.add_argument(
+        "--executors", nargs="+", default=["thread", "process"], help="pool types"
+    )
+    parser.add_argument(
+        "--concurrency", nargs="+", type=int, default=[1, 16, 64], help="clients"
+    )
+    parser.add_argument("--max-workers", type=int, default=2)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-delay", type=float, default=0.0)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results with this JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="relative p99 increase reported as a regression when comparing",
+    )
+    args = parser.parse_args()
+    # matches inside tokens are logged, which would flood the output
+    logging.getLogger("timexy").setLevel(logging.CRITICAL)
+
+    config = {
+        key: getattr(args, key)
+        for key in [
+            "lang",
+            "n_requests",
+            "doc_len",
+            "date_density",
+            "max_workers",
+            "max_batch_size",
+            "max_delay",
+        ]
+    }
+    results = asyncio.run(run(args))
+    baseline: Dict[str, Any] = {}
+    if args.compare:
+        with open(args.compare) as f:
+            saved = json.load(f)
+        if saved["config"] != config:
+            print(f"Baseline was measured with a different config: {saved['config']}")
+        baseline = saved["results"]
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+    if regressions:
+        sys.exit(f"Latency regressed for: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Scaling benchmark of timexy for growing document lengths.
+
+Single docs of a synthetic corpus with an increasing number of words (and
+dates) are annotated and the time per word is measured. The annotation must
+scale linearly with the length of a doc: the run fails if the time per word of
+the longest doc exceeds that of the shortest by more than --max-growth. Results
+can be saved as a JSON baseline and compared with it:
+
+    python benchmarks/scaling.py --save benchmarks/scaling.json
+    python benchmarks/scaling.py --compare benchmarks/scaling.json
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from typing import Any, Dict, List
+
+import spacy
+from corpus import generate_corpus
+
+from timexy import Timexy  # noqa: F401
+
+
+def measure(nlp: Any, text: str, repeats: int) -> Dict[str, float]:
+    seconds = float("inf")
+    for _ in range(repeats):
+        doc = nlp.make_doc(text)
+        start = time.perf_counter()
+        nlp(doc)
+        seconds = min(seconds, time.perf_counter() - start)
+    return {
+        "words": len(doc),
+        "entities": len(doc.ents),
+        "ms": round(seconds * 1000, 2),
+        "us_per_word": round(seconds / len(doc) * 1e6, 3),
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    Print the results next to the baseline and return the regressed benchmarks.
+    """
+    regressions = []
+    print(f"{'benchmark':<12} {'words':>8} {'entities':>8} {'ms':>9} {'us/word':>8}")
+    for name, result in results.items():
+        line = (
+            f"{name:<12} {result['words']:8} {result['entities']:8} "
+            f"{result['ms']:9.2f} {result['us_per_word']:8.3f}"
+        )
+        if name in baseline:
+            change = result["us_per_word"] / baseline[name]["us_per_word"] - 1
+            line += f"  ({change:+.0%} vs. {baseline[name]['us_per_word']:.3f})"
+            if change > tolerance:
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lang", default="en")
+    parser.add_argument(
+        "--doc-lens",
+        nargs="+",
+        type=int,
+        default=[1000, 10000, 100000],
+        help="words per doc",
+    )
+    parser.add_argument(
+        "--date-density",
+        type=float,
+        default=0.1,
+        help="probability of a temporal expression per word",
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--max-growth",
+        type=float,
+        default=2.0,
+        help="allowed ratio of the time per word of the longest and shortest doc",
+    )
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results with this JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="relative slowdown reported as a regression when comparing",
+    )
+    args = parser.parse_args()
+    # matches inside tokens are logged, which would flood the output
+    logging.getLogger("timexy").setLevel(logging.CRITICAL)
+
+    config = {key: getattr(args, key) for key in ["lang", "doc_lens", "date_density"]}
+    nlp = spacy.blank(args.lang)
+    nlp.add_pipe("timexy")
+    # compile the rules before measuring
+    nlp("01.01.2000")
+    results = {}
+    for doc_len in args.doc_lens:
+        [text] = generate_corpus(
+            args.lang, n_docs=1, doc_len=doc_len, date_density=args.date_density
+        )
+        results[f"words/{doc_len}"] = measure(nlp, text, args.repeats)
+
+    baseline: Dict[str, Any] = {}
+    if args.compare:
+        with open(args.compare) as f:
+            saved = json.load(f)
+        if saved["config"] != config:
+            print(f"Baseline was measured with a different config: {saved['config']}")
+        baseline = saved["results"]
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+    if regressions:
+        sys.exit(f"Throughput regressed for: {', '.join(regressions)}")
+    per_word = [result["us_per_word"] for result in results.values()]
+    growth = per_word[-1] / per_word[0]
+    if growth > args.max_growth:
+        sys.exit(
+            f"Time per word grew {growth:.1f}x from the shortest to the longest doc"
+        )
+
+
+if __name__ == "__main__":
+    main()
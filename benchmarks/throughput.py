@@ -0,0 +1,157 @@
+"""
+Throughput benchmark of the timexy component.
+
+Measures docs/sec and matches/sec of Timexy.__call__ and Timexy.pipe for each
+language and kb_id_type on a synthetic corpus (best of --repeat runs, without
+tokenization). Results can be saved as a JSON baseline and compared with it:
+
+    python benchmarks/throughput.py --save benchmarks/throughput.json
+    python benchmarks/throughput.py --compare benchmarks/throughput.json
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from typing import Any, Dict, List
+
+import spacy
+from corpus import generate_corpus
+
+from timexy import Timexy
+
+KB_ID_TYPES = ["timex3", "timestamp"]
+PATHS = ["call", "pipe"]
+
+
+def measure(
+    nlp: spacy.Language, timexy: Timexy, texts: List[str], path: str, repeat: int
+) -> Dict[str, float]:
+    best = float("inf")
+    n_matches = 0
+    for _ in range(repeat):
+        docs = [nlp.make_doc(text) for text in texts]
+        start = time.perf_counter()
+        if path == "call":
+            docs = [timexy(doc) for doc in docs]
+        else:
+            docs = list(timexy.pipe(docs))
+        best = min(best, time.perf_counter() - start)
+        n_matches = sum(len(doc.ents) for doc in docs)
+    return {
+        "docs_per_sec": round(len(texts) / best, 1),
+        "matches_per_sec": round(n_matches / best, 1),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for lang in args.langs:
+        texts = generate_corpus(
+            lang,
+            n_docs=args.n_docs,
+            doc_len=args.doc_len,
+            date_density=args.date_density,
+            duration_mix=args.duration_mix,
+        )
+        for kb_id_type in KB_ID_TYPES:
+            nlp = spacy.blank(lang)
+            timexy = nlp.add_pipe(
+                "timexy",
+                config={
+                    "kb_id_type": kb_id_type,
+                    "profile": args.profile,
+                    "cache_size": args.cache_size,
+                },
+            )
+            for path in PATHS:
+                results[f"{lang}/{kb_id_type}/{path}"] = measure(
+                    nlp, timexy, texts, path, args.repeat
+                )
+            if args.profile:
+                print(f"{lang}/{kb_id_type}\n{timexy.stats.summary()}\n")
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    Print the results next to the baseline and return the regressed benchmarks.
+    """
+    regressions = []
+    print(f"{'benchmark':<24} {'docs/sec':>10} {'matches/sec':>12}")
+    for name, result in results.items():
+        line = (
+            f"{name:<24} {result['docs_per_sec']:10.0f} "
+            f"{result['matches_per_sec']:12.0f}"
+        )
+        if name in baseline:
+            change = result["docs_per_sec"] / baseline[name]["docs_per_sec"] - 1
+            line += f"  ({change:+.0%} vs. {baseline[name]['docs_per_sec']:.0f})"
+            if change < -tolerance:
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--langs", nargs="+", default=["de", "en", "fr"])
+    parser.add_argument("--n-docs", type=int, default=1000)
+    parser.add_argument("--doc-len", type=int, default=100, help="words per doc")
+    parser.add_argument(
+        "--date-density",
+        type=float,
+        default=0.02,
+        help="probability of a temporal expression per word",
+    )
+    parser.add_argument(
+        "--duration-mix",
+        type=float,
+        default=0.3,
+        help="share of durations among the temporal expressions",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--cache-size", type=int, default=1024, help="size of the kb_id cache"
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="print the per-rule statistics"
+    )
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results with this JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="relative slowdown reported as a regression when comparing",
+    )
+    args = parser.parse_args()
+    # matches inside tokens are logged, which would flood the output
+    logging.getLogger("timexy").setLevel(logging.CRITICAL)
+
+    config = {
+        key: getattr(args, key)
+        for key in ["n_docs", "doc_len", "date_density", "duration_mix", "cache_size"]
+    }
+    results = run(args)
+    baseline: Dict[str, Any] = {}
+    if args.compare:
+        with open(args.compare) as f:
+            saved = json.load(f)
+        if saved["config"] != config:
+            print(f"Baseline was measured with a different config: {saved['config']}")
+        baseline = saved["results"]
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+    if regressions:
+        sys.exit(f"Throughput regressed for: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+import spacy
+
+from timexy import Extractor, Timexy  # noqa: F401
+from timexy.aio import AsyncExtractor, AsyncPipeline, MicroBatcher
+
+texts = [
+    "Today is 03. January 1999, six years after 03.10.1993.",
+    "No date here",
+    "It lasted for 2 weeks",
+] * 20
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_async_pipeline(executor: str) -> None:
+    nlp = spacy.blank("en")
+    nlp.add_pipe("timexy", config={"structured": True})
+    expected = [
+        [(e.start_char, e.end_char, e.kb_id_) for e in doc.ents]
+        for doc in nlp.pipe(texts)
+    ]
+
+    async def run() -> List:
+        async with AsyncPipeline(nlp, executor=executor, max_workers=2) as apipe:
+            return await asyncio.gather(*(apipe(text) for text in texts))
+
+    docs = asyncio.run(run())
+    assert [
+        [(e.start_char, e.end_char, e.kb_id_) for e in doc.ents] for doc in docs
+    ] == expected
+    assert docs[2]._.timexy.tolist() == [(3, 5, 2, 2, "W")]
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_async_extractor(executor: str) -> None:
+    expected = list(Extractor("en").pipe(texts))
+
+    async def run() -> List:
+        async with AsyncExtractor("en", executor=executor) as aextract:
+            return await asyncio.gather(*(aextract(text) for text in texts))
+
+    assert asyncio.run(run()) == expected
+
+    with pytest.raises(ValueError):
+        AsyncExtractor("en", executor="fiber")
+
+
+def test_micro_batching() -> None:
+    release = threading.Event()
+    batches = []
+
+    def process_batch(items: List[int]) -> List[int]:
+        release.wait()
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    async def run() -> List[int]:
+        batcher = MicroBatcher(
+            process_batch,
+            ThreadPoolExecutor(1),
+            max_batch_size=4,
+            max_pending=2,
+            max_in_flight=1,
+        )
+        tasks = [asyncio.ensure_future(batcher.submit(i)) for i in range(10)]
+        for _ in range(10):
+            await asyncio.sleep(0)
+        # one batch is processed, the others wait in the bounded queue
+        assert batcher._queue.qsize() == 2
+        assert not any(task.done() for task in tasks)
+        release.set()
+        results = await asyncio.gather(*tasks)
+        await batcher.aclose()
+        return results
+
+    assert asyncio.run(run()) == [i * 2 for i in range(10)]
+    # requests arriving while a batch is processed are coalesced
+    assert 1 < max(len(batch) for batch in batches) <= 4
+    assert sorted(item for batch in batches for item in batch) == list(range(10))
+
+
+def test_micro_batching_error() -> None:
+    def process_batch(items: List[int]) -> List[int]:
+        raise RuntimeError("failed")
+
+    async def run() -> None:
+        batcher = MicroBatcher(process_batch, ThreadPoolExecutor(1))
+        results = await asyncio.gather(
+            *(batcher.submit(i) for i in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        await batcher.aclose()
+
+    asyncio.run(run())
+    with pytest.raises(ValueError):
+        MicroBatcher(process_batch, ThreadPoolExecutor(1), max_pending=0)
+
+
+def test_micro_batching_rejected() -> None:
+    async def run() -> None:
+        executor = ThreadPoolExecutor(1)
+        batcher = MicroBatcher(lambda items: items, executor)
+        assert await batcher.submit(1) == 1
+        # the executor rejects further batches, the callers get the error
+        executor.shutdown()
+        for item in (2, 3):
+            with pytest.raises(RuntimeError):
+                await asyncio.wait_for(batcher.submit(item), 5)
+        await batcher.aclose()
+
+    asyncio.run(run())
+
+
+def test_micro_batching_close_while_collecting() -> None:
+    async def run() -> None:
+        batcher = MicroBatcher(lambda items: items, ThreadPoolExecutor(1), max_delay=10)
+        task = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0.1)
+        # the item is part of the batch being collected
+        await batcher.aclose()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, 5)
+
+    asyncio.run(run())
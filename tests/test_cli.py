@@ -0,0 +1,131 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import spacy
+
+from timexy.cli import main
+
+TEXTS = [
+    "Today is the 10.10.2010.",
+    "I was in Paris for six years.",
+    "",
+    "No date here",
+    "3 Jan 99 and Jan 03, 1999 for two weeks",
+]
+
+
+def read_jsonl(path: Path) -> list:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_cli_text(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    input_path = tmp_path / "input.txt"
+    input_path.write_text("\n".join(TEXTS) + "\n")
+    output_path = tmp_path / "output.jsonl"
+    main([str(input_path), "-o", str(output_path), "--batch-size", "2"])
+
+    records = read_jsonl(output_path)
+    # empty lines are skipped, but counted in the index
+    assert [r["idx"] for r in records] == [0, 1, 3, 4]
+    assert records[0]["ents"] == [
+        {
+            "start_char": 13,
+            "end_char": 23,
+            "text": "10.10.2010",
+            "label": "timexy",
+            "kb_id": 'TIMEX3 type="DATE" value="2010-10-10T00:00:00"',
+        }
+    ]
+    assert [e["text"] for e in records[3]["ents"]] == [
+        "3 Jan 99",
+        "Jan 03, 1999",
+        "two weeks",
+    ]
+    assert "Processed 4 docs with 5 entities" in capsys.readouterr().err
+
+
+def test_cli_jsonl(tmp_path: Path) -> None:
+    input_path = tmp_path / "input.jsonl"
+    input_path.write_text(
+        "".join(
+            json.dumps({"id": f"doc{i}", "content": text}) + "\n"
+            for i, text in enumerate(TEXTS * 10)
+        )
+    )
+    args = [str(input_path), "--text-key", "content", "--batch-size", "3"]
+    main(args + ["-o", str(tmp_path / "serial.jsonl"), "--kb-id-type", "timestamp"])
+    serial = read_jsonl(tmp_path / "serial.jsonl")
+    assert serial[0]["id"] == "doc0"
+    assert serial[0]["ents"][0]["kb_id"] == "1286668800.0"
+
+    # python -m timexy with worker processes
+    for order in (["--unordered"], []):
+        subprocess.run(
+            [sys.executable, "-m", "timexy", *args, "--kb-id-type", "timestamp"]
+            + ["--n-process", "2", "-o", str(tmp_path / "parallel.jsonl"), *order],
+            check=True,
+        )
+        parallel = read_jsonl(tmp_path / "parallel.jsonl")
+        if order:
+            parallel.sort(key=lambda r: r["idx"])
+        assert parallel == serial
+
+
+def test_cli_invalid_lines(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    input_path = tmp_path / "input.jsonl"
+    input_path.write_text(
+        "\n".join(
+            [
+                json.dumps({"text": TEXTS[0], "idx": "a", "ents": []}),
+                "{not json",
+                json.dumps(["a list"]),
+                json.dumps({"content": TEXTS[0]}),
+                json.dumps({"text": TEXTS[1], "id": 4}),
+            ]
+        )
+        + "\n"
+    )
+    args = [str(input_path), "--batch-size", "2"]
+    main(args + ["-o", str(tmp_path / "serial.jsonl")])
+    serial = read_jsonl(tmp_path / "serial.jsonl")
+    # the output fields replace those of the input
+    assert [(r["idx"], len(r["ents"])) for r in serial] == [(0, 1), (4, 1)]
+    assert serial[1]["id"] == 4
+    err = capsys.readouterr().err
+    assert "Fields ['idx', 'ents'] of line 1" in err
+    for line_no in (2, 3, 4):
+        assert f"Skipping line {line_no}: " in err
+
+    # the workers skip the lines as well
+    subprocess.run(
+        [sys.executable, "-m", "timexy", *args, "--n-process", "2"]
+        + ["-o", str(tmp_path / "parallel.jsonl")],
+        check=True,
+    )
+    assert read_jsonl(tmp_path / "parallel.jsonl") == serial
+
+
+def test_cli_model_config(tmp_path: Path) -> None:
+    nlp = spacy.blank("en")
+    nlp.add_pipe("timexy", config={"kb_id_type": "timestamp"})
+    nlp.to_disk(tmp_path / "model")
+    input_path = tmp_path / "input.txt"
+    input_path.write_text(TEXTS[0] + "\n")
+    output_path = tmp_path / "output.jsonl"
+
+    # the settings of the model are kept unless overridden
+    main([str(input_path), "-o", str(output_path), "--model", str(tmp_path / "model")])
+    assert read_jsonl(output_path)[0]["ents"][0]["kb_id"] == "1286668800.0"
+    main(
+        [str(input_path), "-o", str(output_path), "--model", str(tmp_path / "model")]
+        + ["--timezone", "Europe/Berlin"]
+    )
+    assert read_jsonl(output_path)[0]["ents"][0]["kb_id"] == "1286661600.0"
+    main(
+        [str(input_path), "-o", str(output_path), "--model", str(tmp_path / "model")]
+        + ["--kb-id-type", "timex3"]
+    )
+    assert read_jsonl(output_path)[0]["ents"][0]["kb_id"].startswith("TIMEX3")
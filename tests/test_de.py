@@ -2,6 +2,7 @@ import pytest
 import spacy
 from spacy.language import Language
 
+from timexy import Timexy  # noqa: F401
 from timexy.languages.de import de
 
 label = "timexy_label"
@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import pytest
+
+from timexy import Extractor, extract
+from timexy.languages.de import de
+from timexy.languages.en import en
+from timexy.languages.fr import fr
+
+test_data = [
+    (timexy_lang.lang, *t)
+    for timexy_lang in (de, en, fr)
+    for rule in timexy_lang.rules
+    for t in rule.tests
+]
+
+
+@pytest.mark.parametrize("lang,text,date_start,date_end", test_data)
+def test_rule(lang: str, text: str, date_start: int, date_end: int) -> None:
+    timexes = next(extract([text], lang=lang))
+    assert [
+        t
+        for t in timexes
+        if t.start_char == date_start
+        and t.end_char == date_end
+        and t.kb_id.startswith('TIMEX3 type="DATE"')
+    ]
+
+
+def test_extract() -> None:
+    texts = [
+        "Today is the 01.01.1990, six years after 01.01.1984.",
+        "No date here",
+        "It took 3 weeks and zero days.",
+        "x3/10/1999 is no date",
+    ]
+    assert [[(t.text, t.kb_id) for t in timexes] for timexes in extract(texts)] == [
+        [
+            ("01.01.1990", 'TIMEX3 type="DATE" value="1990-01-01T00:00:00"'),
+            ("six years", 'TIMEX3 type="DURATION" value="P6Y"'),
+            ("01.01.1984", 'TIMEX3 type="DATE" value="1984-01-01T00:00:00"'),
+        ],
+        [],
+        [("3 weeks", 'TIMEX3 type="DURATION" value="P3W"')],
+        [],
+    ]
+    assert list(extract(texts, batch_size=1)) == list(extract(texts, batch_size=3))
+
+
+def test_extractor_timestamp() -> None:
+    extractor = Extractor("de", kb_id_type="timestamp")
+    timexes = extractor("Heute ist der 03. Januar 1999.")
+    assert [t.text for t in timexes] == ["03. Januar 1999"]
+    assert float(timexes[0].kb_id) == 915321600
+
+    extractor = Extractor("de", kb_id_type="timestamp", timezone="Europe/Berlin")
+    assert float(extractor("Heute ist der 03. Januar 1999.")[0].kb_id) == 915318000
+
+    with pytest.raises(ValueError):
+        Extractor("de", kb_id_type="illegal")
+    with pytest.raises(ValueError):
+        Extractor("de", timezone="Mars/Olympus_Mons")
+    with pytest.raises(NameError):
+        Extractor("xx")
+
+
+@pytest.mark.parametrize("chunk_size", [5, 16, 100, 1 << 20])
+def test_extract_file(tmp_path: Path, chunk_size: int) -> None:
+    text = (
+        "Der 3. Januar 1999 war schön, über zwei Wochen\n\nvor dem 10.10.2010. "
+        "Ärger gab es am 1. Februar 2000 und 01.01.1990 01.01.1990 für 3 Jahre.\n"
+    ) * 20
+    path = tmp_path / "large.txt"
+    path.write_text(text, encoding="utf-8")
+    extractor = Extractor("de")
+
+    timexes = list(extractor.extract_file(path, chunk_size=chunk_size))
+    assert timexes == extractor(text)
+    assert len(timexes) == 20 * 7
+    assert all(text[t.start_char : t.end_char] == t.text for t in timexes)
+
+
+def test_extract_empty_file(tmp_path: Path) -> None:
+    path = tmp_path / "empty.txt"
+    path.write_text("")
+    assert list(Extractor("de").extract_file(path)) == []
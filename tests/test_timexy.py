@@ -1,9 +1,29 @@
 import datetime as dt
+import json
+import os
+import pickle
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Optional, Tuple
 
 import pytest
 import spacy
+import srsly
+from spacy.tokens import Span
 
-from timexy.timexy import Timexy
+from timexy import records, registry
+from timexy import scanner as scanner_module
+from timexy import util
+from timexy.language import Language, load_language
+from timexy.rule import Rule
+from timexy.scanner import DateScanner, literal_anchor
+from timexy.timexy import Timexy, _align, _token_offsets
 
 
 def test_supported_lang() -> None:
@@ -19,22 +39,190 @@ def test_unsupported_lang() -> None:
 
 
 @pytest.mark.parametrize(
-    "datestring, date_format, datestring_expected, date_format_expected",
+    "text, regex, pattern, expected",
     [
-        ("3 February 2010", "%d %B %Y", "3 2 2010", "%d %m %Y"),
-        ("3. Mar 2020", "%d. %b %Y", "3. 3 2020", "%d. %m %Y"),
+        (
+            "3 February 2010",
+            "(\\d{1,2}) ([A-Za-z]+) (\\d{4})",
+            "%d %B %Y",
+            (2010, 2, 3),
+        ),
+        (
+            "3. Mar 2020",
+            "(\\d{1,2})\\. ([A-Za-z]+) (\\d{4})",
+            "%d. %b %Y",
+            (2020, 3, 3),
+        ),
+        (
+            "3. MAR 2020",
+            "(\\d{1,2})\\. ([A-Za-z]+) (\\d{4})",
+            "%d. %b %Y",
+            (2020, 3, 3),
+        ),
+        ("3. Mars 2020", "(\\d{1,2})\\. ([A-Za-z]+) (\\d{4})", "%d. %b %Y", None),
     ],
 )
-def test_replace_month_str(
-    datestring: str,
-    date_format: str,
-    datestring_expected: str,
-    date_format_expected: str,
+def test_to_date_month_str(
+    text: str, regex: str, pattern: str, expected: Optional[Tuple[int, int, int]]
 ) -> None:
-    timexy = Timexy(spacy.blank("en"))
-    datestring_new, date_format_new = timexy._replace_month_str(datestring, date_format)
-    assert datestring_expected == datestring_new
-    assert date_format_expected == date_format_new
+    scanner = DateScanner(
+        [Rule(regex=regex, pattern=pattern, tests=[])], load_language("en").month_idxs
+    )
+    [(rule_idx, m)] = scanner.scan(text)
+    d = scanner.to_date(rule_idx, m)
+    assert (d if d is None else (d.year, d.month, d.day)) == expected
+
+
+def replace_month_str(
+    timexy_lang: Language, datestring: str, date_format: str
+) -> Tuple[str, str]:
+    # the month string replaced with its index for strptime
+    if "%b" in date_format or "%B" in date_format:
+        month_strs = sorted(
+            (m for month_strs in timexy_lang.months for m in month_strs),
+            key=len,
+            reverse=True,
+        )
+        m = re.search("|".join(map(re.escape, month_strs)), datestring, re.IGNORECASE)
+        if m:
+            datestring = (
+                datestring[: m.start()].lower()
+                + str(timexy_lang.month_idxs[m.group(0).casefold()])
+                + datestring[m.end() :].lower()
+            )
+            date_format = date_format.replace("%b", "%m").replace("%B", "%m")
+    return datestring, date_format
+
+
+@pytest.mark.parametrize("lang", ["de", "en", "fr"])
+def test_scanner_equivalence(lang: str) -> None:
+    timexy_lang = getattr(import_module(f"timexy.languages.{lang}"), lang)
+    scanner = DateScanner(timexy_lang.rules, {})
+    text = " ".join(t[0] for rule in timexy_lang.rules for t in rule.tests)
+    text += " 123/10/1999 03.10.19999 1999-10-3-10-1999 3 Jan 1999, 1.1.1"
+    expected = [(idx, m.span()) for idx, m in scanner.scan_per_rule(text)]
+    assert [(idx, m.span()) for idx, m in scanner.scan(text)] == expected
+    assert [(idx, m.span()) for idx, m in scanner.scan_anchored(text)] == expected
+    assert [(idx, m.span()) for idx, m in scanner.scan_anchored(text, pos=20)] == [
+        (idx, m.span()) for idx, m in scanner.scan_per_rule(text, pos=20)
+    ]
+
+
+def test_literal_anchor() -> None:
+    assert literal_anchor("(?<![0-9])([0-2]?\\d|30|31)\\.(1[0-2]|0?\\d)") == (
+        ["."],
+        1,
+        2,
+    )
+    # the longer strings are preferred, unbounded repeats before them leave the
+    # maximum offset open
+    assert literal_anchor("(\\d{1,2})\\s+(Jan|January),? (\\d{4})") == (
+        ["Jan", "January"],
+        2,
+        None,
+    )
+    assert literal_anchor("(\\d{1,2})\\s{1,3}(Jan|January),? (\\d{4})") == (
+        ["Jan", "January"],
+        2,
+        5,
+    )
+    assert literal_anchor("(\\d{4})/(\\d{2})") == (["/"], 4, 4)
+    assert literal_anchor("(\\d{4})") is None
+    assert literal_anchor("(?i)(\\d{4})/(\\d{2})") is None
+
+    # anchors overlapping each other and rules without an anchor
+    rules = [
+        Rule(regex="(\\d{2})abc", pattern="%y", tests=[]),
+        Rule(regex="bcd(\\d{2})", pattern="%y", tests=[]),
+        Rule(regex="(\\d{2})\\s+ab", pattern="%y", tests=[]),
+        Rule(regex="(?<!\\d)(\\d{4})", pattern="%Y", tests=[]),
+    ]
+    scanner = DateScanner(rules, {})
+    text = "12abcd34 1999 56   abcd 7812"
+    assert [(idx, m.span()) for idx, m in scanner.scan_anchored(text)] == [
+        (idx, m.span()) for idx, m in scanner.scan_per_rule(text)
+    ]
+
+
+@pytest.mark.parametrize(
+    "lang,text,span",
+    [
+        ("en", "Due 03." + " " * 70 + "January 1999 ok", (4, 89)),
+        ("en", "3" + " " * 80 + "Jan 1999", (0, 89)),
+        ("de", "Am 3." + " " * 70 + "Januar 1999", (3, 86)),
+        ("fr", "le 3" + " " * 70 + "janvier 1999", (3, 86)),
+    ],
+)
+def test_scan_anchored_long_prefix(lang: str, text: str, span: Tuple[int, int]) -> None:
+    # more than 64 characters of whitespace between the day and the month
+    scanner = DateScanner(load_language(lang).rules, {})
+    assert [(idx, m.span()) for idx, m in scanner.scan_anchored(text)] == [
+        (idx, m.span()) for idx, m in scanner.scan_per_rule(text)
+    ]
+    nlp = spacy.blank(lang)
+    nlp.add_pipe("timexy")
+    [ent] = nlp(text).ents
+    assert (ent.start_char, ent.end_char) == span
+    assert ent.kb_id_ == 'TIMEX3 type="DATE" value="1999-01-03T00:00:00"'
+
+
+def test_scanner_config() -> None:
+    text = "Today is 03. January 1999, 03.10.1999 and Jan 03, 1999 for six years."
+    nlp_combined = spacy.blank("en")
+    nlp_combined.add_pipe("timexy", config={"scanner": "combined"})
+    nlp_per_rule = spacy.blank("en")
+    nlp_per_rule.add_pipe("timexy", config={"scanner": "per_rule"})
+    assert [(e.start_char, e.end_char, e.kb_id_) for e in nlp_combined(text).ents] == [
+        (e.start_char, e.end_char, e.kb_id_) for e in nlp_per_rule(text).ents
+    ]
+
+    with pytest.raises(ValueError):
+        Timexy(spacy.blank("en"), scanner="illegal")
+
+
+@pytest.mark.parametrize("lang", ["de", "en", "fr"])
+def test_to_date_equivalence(lang: str) -> None:
+    timexy = Timexy(spacy.blank(lang))
+    texts = [t[0] for rule in timexy.timexy_lang.rules for t in rule.tests]
+    texts += [
+        "31.02.1999 29.02.2000 29.02.1900 00.10.1999 3.0.99 30/02/99 31-04-2021",
+        "29/2/04 31.12.68 1.1.69 0/1/1999 2000/02/30 2000-00-10 12-31-2000",
+    ]
+    # strptime of the matches with the month strings replaced as the reference
+    for text in texts:
+        for rule_idx, m in timexy.date_scanner.scan(text):
+            try:
+                datestring, date_format = replace_month_str(
+                    timexy.timexy_lang,
+                    m.group(0),
+                    timexy.date_scanner.patterns[rule_idx],
+                )
+                expected = dt.datetime.strptime(datestring, date_format)
+            except ValueError:
+                expected = None
+            assert timexy.date_scanner.to_date(rule_idx, m) == expected
+
+
+def test_get_date_groups() -> None:
+    assert Rule(
+        regex="(\\d{2})\\.(\\d{2})\\.(\\d{4})", pattern="%d.%m.%Y", tests=[]
+    ).get_date_groups() == {"day": 1, "month": 2, "year": 3}
+    assert Rule(
+        regex="([A-Z]+) (\\d{2})", pattern="%B %y", tests=[]
+    ).get_date_groups() == {"month_str": 1, "short_year": 2}
+    with pytest.raises(ValueError):
+        Rule(regex="(\\d{2}):(\\d{2})", pattern="%H:%M", tests=[]).get_date_groups()
+    with pytest.raises(ValueError):
+        Rule(regex="(\\d{2})", pattern="%d.%m", tests=[]).get_date_groups()
+
+
+@pytest.mark.parametrize("lang", ["de", "en", "fr"])
+def test_month_tables(lang: str) -> None:
+    timexy_lang = getattr(import_module(f"timexy.languages.{lang}"), lang)
+    for month_idx, month_strs in enumerate(timexy_lang.months, start=1):
+        for month_str in month_strs:
+            assert timexy_lang.month_idxs[month_str.casefold()] == month_idx
+            assert timexy_lang.month_idxs[month_str.upper().casefold()] == month_idx
 
 
 def test_kb_id_timestamp() -> None:
@@ -45,10 +233,54 @@ def test_kb_id_timestamp() -> None:
     doc = nlp(text)
     assert doc.ents
     assert doc.ents[0].kb_id_ == str(
-        dt.datetime.strptime("01.01.1990", "%d.%m.%Y").timestamp()
+        dt.datetime(1990, 1, 1, tzinfo=dt.timezone.utc).timestamp()
     )
 
 
+@pytest.mark.parametrize(
+    "timezone,expected",
+    [
+        ("UTC", dt.datetime(1990, 7, 1, tzinfo=dt.timezone.utc).timestamp()),
+        ("local", dt.datetime.strptime("01.07.1990", "%d.%m.%Y").timestamp()),
+        ("Europe/Berlin", 646783200.0),
+        ("America/New_York", 646804800.0),
+    ],
+)
+def test_kb_id_timestamp_timezone(timezone: str, expected: float) -> None:
+    nlp = spacy.blank("en")
+    nlp.add_pipe("timexy", config={"kb_id_type": "timestamp", "timezone": timezone})
+    doc = nlp("It happened on 01.07.1990.")
+    assert doc.ents[0].kb_id_ == str(expected)
+
+
+def test_illegal_timezone() -> None:
+    with pytest.raises(ValueError):
+        Timexy(spacy.blank("en"), timezone="Mars/Olympus_Mons")
+
+
+@pytest.mark.parametrize("kb_id_type", ["timex3", "timestamp"])
+@pytest.mark.parametrize("timezone", ["UTC", "Europe/Berlin"])
+def test_epochs(kb_id_type: str, timezone: str) -> None:
+    nlp = spacy.blank("en")
+    timexy = nlp.add_pipe(
+        "timexy", config={"kb_id_type": kb_id_type, "timezone": timezone}
+    )
+    texts = [
+        "Due 01.07.1990 for two weeks",
+        "No date here",
+        "1 January 2020 and 03.10.1993",
+    ]
+    epochs = timexy.epochs(nlp.pipe(texts))
+    tz = util.get_timezone(timezone)
+    expected = [
+        (0, 4, 14, dt.datetime(1990, 7, 1, tzinfo=tz).timestamp()),
+        (2, 0, 14, dt.datetime(2020, 1, 1, tzinfo=tz).timestamp()),
+        (2, 19, 29, dt.datetime(1993, 10, 3, tzinfo=tz).timestamp()),
+    ]
+    assert epochs.tolist() == expected
+    assert timexy.epochs([]).shape == (0,)
+
+
 def test_kb_id_timex3() -> None:
     nlp = spacy.blank("en")
     config = {"kb_id_type": "timex3", "label": "timexy", "overwrite": False}
@@ -139,3 +371,649 @@ def test_overwrite_duration_false() -> None:
     assert doc[2].ent_type_ == "EXISTING_ENT"
     assert doc[3].ent_type_ == "EXISTING_ENT"
     assert doc.ents[0].text == "took six years"
+
+
+def test_entity_commit_linear_time() -> None:
+    nlp = spacy.blank("en")
+    timexy = Timexy(nlp)
+    kb_id = 'TIMEX3 type="DATE" value="1990-01-01T00:00:00"'
+    durations = {}
+    for n_dates in (1000, 10000):
+        # every date is matched twice to also run into the overlap resolution
+        ents_to_add = [(i, i + 1, kb_id, 0, 726468, "") for i in range(n_dates)] * 2
+        timexy._date_matches = lambda doc, _, rules, ents=ents_to_add: ents  # type: ignore
+        durations[n_dates] = float("inf")
+        for _ in range(3):
+            doc = nlp.make_doc("01.01.1990 " * n_dates)
+            start = time.perf_counter()
+            timexy(doc)
+            durations[n_dates] = min(durations[n_dates], time.perf_counter() - start)
+            assert len(doc.ents) == n_dates
+
+    # a quadratic commit would take about 100 times longer for 10 times the dates
+    assert durations[10000] < 30 * durations[1000]
+
+
+def test_resolve_overlaps_long_spans() -> None:
+    nlp = spacy.blank("en")
+    timexy = Timexy(nlp, prefilter=False)
+    doc = nlp.make_doc("x " * 20)
+    # spans much longer than those of the built-in rules
+    doc.ents = [Span(doc, 1, 12, label="timexy", kb_id="existing")]
+    ents_to_add = [
+        (10, 14, "shorter", 0, 0, ""),
+        (13, 19, "new", 0, 0, ""),
+        (2, 17, "longer", 0, 0, ""),
+        (0, 3, "shorter", 0, 0, ""),
+    ]
+    timexy._date_matches = lambda doc, _, rules: ents_to_add  # type: ignore
+    assert [(e.start, e.end, e.kb_id_) for e in timexy(doc).ents] == [(2, 17, "longer")]
+
+    doc = nlp.make_doc("x " * 20)
+    doc.ents = [Span(doc, 0, 12, label="ORG")]
+    assert [(e.start, e.end, e.label_) for e in timexy(doc).ents] == [
+        (0, 12, "ORG"),
+        (13, 19, "timexy"),
+    ]
+    timexy.overwrite = True
+    assert [(e.start, e.end, e.kb_id_) for e in timexy(doc).ents] == [(2, 17, "longer")]
+
+
+def test_align() -> None:
+    nlp = spacy.blank("en")
+    doc = nlp.make_doc("On 03.10.1993,  it  moved\nto x03.10.1993 (for 2 years). ")
+    n_chars = len(doc.text)
+    ranges = [
+        (start, end)
+        for start in range(n_chars)
+        for end in range(start + 1, n_chars + 1)
+    ]
+    starts, ends, aligned = _align(
+        _token_offsets(doc), [r[0] for r in ranges], [r[1] for r in ranges]
+    )
+    for (start_char, end_char), start, end, is_aligned in zip(
+        ranges, starts, ends, aligned
+    ):
+        span = doc.char_span(start_char, end_char)
+        assert is_aligned == (span is not None)
+        if span is not None:
+            assert (start, end) == (span.start, span.end)
+
+    assert _align(_token_offsets(nlp.make_doc("")), [0], [1])[2] == [False]
+
+
+def test_misaligned_date(caplog: pytest.LogCaptureFixture) -> None:
+    nlp = spacy.blank("en")
+    nlp.add_pipe("timexy")
+    doc = nlp("Date:03.10.1993 and 04.10.1993")
+    assert [e.text for e in doc.ents] == ["04.10.1993"]
+    assert "Span could not be retrieved" in caplog.text
+    assert "datestring 03.10.1993 with character offsets (5, 15)" in caplog.text
+
+
+def test_date_matches_linear_time() -> None:
+    nlp = spacy.blank("en")
+    nlp.add_pipe("timexy")
+    durations = {}
+    for n_dates in (1000, 10000):
+        durations[n_dates] = float("inf")
+        for _ in range(3):
+            doc = nlp.make_doc("It was 03.10.1993 or so. " * n_dates)
+            start = time.perf_counter()
+            nlp(doc)
+            durations[n_dates] = min(durations[n_dates], time.perf_counter() - start)
+            assert len(doc.ents) == n_dates
+
+    assert durations[10000] < 30 * durations[1000]
+
+
+def test_pipe() -> None:
+    nlp = spacy.blank("en")
+    nlp.add_pipe("timexy")
+    texts = [
+        "Today is 03. January 1999, six years after 03.10.1993.",
+        "It happened in January",
+        "1999 was the year, 12/03/2020 another one.",
+        "",
+        "No date here",
+        "3 Jan 99 and Jan 03, 1999 for two weeks",
+    ] * 3
+    expected = [
+        [(e.start_char, e.end_char, e.kb_id_) for e in nlp(text).ents] for text in texts
+    ]
+    for batch_size in (1, 4, 100):
+        assert [
+            [(e.start_char, e.end_char, e.kb_id_) for e in doc.ents]
+            for doc in nlp.pipe(texts, batch_size=batch_size)
+        ] == expected
+
+
+def test_pipe_lookarounds() -> None:
+    # lookarounds and anchors of the rule see the separator of the joined texts
+    nlp = spacy.blank("en")
+    timexy = nlp.add_pipe("timexy")
+    rules = [
+        Rule(
+            regex="(?<!\\S)(\\d{4})_(\\d{2})_(\\d{2})(?!\\S)",
+            pattern="%Y_%m_%d",
+            tests=[("Invoice of 2021_03_04", 11, 21)],
+        ),
+        Rule(regex="^(\\d{2})~(\\d{4})$", pattern="%m~%Y", tests=[("03~2021", 0, 7)]),
+    ]
+    assert not timexy.date_scanner.sees_separator
+    timexy.add_rules(rules)
+    assert timexy.date_scanner.sees_separator
+    texts = ["2021_03_04", "Paid 2021_03_04", "2021_03_04 paid", "03~2021"]
+    expected = [[e.text for e in nlp(text).ents] for text in texts]
+    assert expected == [["2021_03_04"]] * 3 + [["03~2021"]]
+    assert [[e.text for e in doc.ents] for doc in nlp.pipe(texts)] == expected
+    assert [
+        [m.group() for _, _, _, m in text_matches]
+        for text_matches in timexy.date_scanner.scan_texts(texts)
+    ] == expected
+
+
+def test_pickle(monkeypatch: pytest.MonkeyPatch) -> None:
+    nlp = spacy.blank("de")
+    timexy = nlp.add_pipe("timexy", config={"label": "date", "overwrite": True})
+    text = "Heute ist der 03. Januar 1999, vor sechs Jahren und am 03.10.1993."
+    expected = [(e.start_char, e.end_char, e.label_, e.kb_id_) for e in nlp(text).ents]
+
+    # compare with a component loading and compiling the rules
+    registry.clear()
+    start = time.perf_counter()
+    assert Timexy(nlp, label="date", overwrite=True).date_scanner
+    init_time = time.perf_counter() - start
+
+    data = pickle.dumps(timexy)
+    # the pickle only contains the config and the analyzed rules as plain data
+    assert len(data) < 8000
+
+    start = time.perf_counter()
+    timexy_unpickled = pickle.loads(data)
+    unpickle_time = time.perf_counter() - start
+    assert unpickle_time < init_time
+
+    assert timexy_unpickled.cfg == timexy.cfg
+    # the rules are not analyzed again after unpickling
+    registry.clear()
+    monkeypatch.setattr(scanner_module, "_analyze", None)
+    doc = timexy_unpickled(nlp.make_doc(text))
+    assert [(e.start_char, e.end_char, e.label_, e.kb_id_) for e in doc.ents] == (
+        expected
+    )
+
+
+def test_prefilter() -> None:
+    texts = [
+        "Nothing temporal in here.",
+        "Today is the 01.01.1990.",
+        "It took six years.",
+        "See you in January",
+        "Nothing here either.",
+    ]
+    nlp = spacy.blank("en")
+    timexy = nlp.add_pipe("timexy")
+    nlp_no_prefilter = spacy.blank("en")
+    nlp_no_prefilter.add_pipe("timexy", config={"prefilter": False})
+
+    expected = [[e.kb_id_ for e in nlp_no_prefilter(text).ents] for text in texts]
+    assert [[e.kb_id_ for e in nlp(text).ents] for text in texts] == expected
+    assert (timexy.stats.n_docs, timexy.stats.n_docs_skipped) == (5, 2)
+    assert [[e.kb_id_ for e in doc.ents] for doc in nlp.pipe(texts)] == expected
+    assert (timexy.stats.n_docs, timexy.stats.n_docs_skipped) == (10, 4)
+
+
+def test_registry() -> None:
+    registry.clear()
+    registry.warmup(["en"])
+    compiled = registry.get_compiled(load_language("en"))
+    timexy_1 = Timexy(spacy.blank("en"))
+    timexy_2 = Timexy(spacy.blank("en"))
+    assert timexy_1.date_scanner is compiled.date_scanner
+    assert timexy_2.date_scanner is compiled.date_scanner
+
+    # changed rules are compiled again
+    timexy_lang = Language.from_table(compiled.timexy_lang.to_table())
+    timexy_lang.rules = timexy_lang.rules[:1]
+    assert registry.get_compiled(timexy_lang) is not compiled
+    assert len(registry.get_compiled(timexy_lang).date_scanner.regexes) == 1
+
+    registry.clear()
+    assert Timexy(spacy.blank("en")).date_scanner is not compiled.date_scanner
+
+
+def test_lazy_import() -> None:
+    code = (
+        "import sys, timexy; "
+        "assert not {'spacy', 'pydantic', 'timexy.language'} & set(sys.modules); "
+        "assert callable(timexy.extract) and timexy.Timexy and 'spacy' in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_skip_rule_validation() -> None:
+    code = (
+        "from timexy.language import load_language; "
+        "from timexy.timexy import Timexy; import spacy; "
+        "nlp = spacy.blank('de'); nlp.add_pipe('timexy'); "
+        "assert [e.kb_id_ for e in nlp('am 10. Mai 2021').ents] == "
+        '[\'TIMEX3 type="DATE" value="2021-05-10T00:00:00"\']'
+    )
+    env = dict(os.environ, TIMEXY_VALIDATE_RULES="0")
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
+
+
+def test_add_rules() -> None:
+    nlp = spacy.blank("en")
+    timexy = nlp.add_pipe("timexy", config={"profile": True})
+    text = "Invoice of 2021_03_04, paid on 04 Sept 2021"
+    assert not nlp(text).ents
+    n_rules = len(timexy.timexy_lang.rules)
+    regexes = timexy.date_scanner.regexes
+    n_compiled = len(registry._compiled)
+
+    rule = Rule(
+        regex="(\\d{4})_(\\d{2})_(\\d{2})",
+        pattern="%Y_%m_%d",
+        tests=[("Invoice of 2021_03_04", 11, 21)],
+    )
+    timexy.add_rules([rule])
+    assert [e.kb_id_ for e in nlp(text).ents] == [
+        'TIMEX3 type="DATE" value="2021-03-04T00:00:00"'
+    ]
+    # only the new rule is compiled, the counters of the others are kept
+    assert timexy.date_scanner.regexes[:n_rules] == regexes
+    assert timexy.stats.n_docs == 2 and timexy.stats.rules[n_rules].hits == 1
+
+    # rules are validated against their tests
+    month_rule = Rule(
+        regex="(\\d{2}) (Sept) (\\d{4})",
+        pattern="%d %b %Y",
+        tests=[("paid on 04 Sept 2021", 8, 20)],
+    )
+    with pytest.raises(ValueError):
+        timexy.add_rules([month_rule])
+    with pytest.raises(ValueError):
+        timexy.add_rules([Rule(regex=rule.regex, pattern=rule.pattern, tests=[])])
+    with pytest.raises(ValueError):
+        timexy.add_month_aliases(9, ["Jan"])
+    assert len(timexy.timexy_lang.rules) == n_rules + 1
+
+    timexy.add_month_aliases(9, ["Sept"])
+    timexy.add_rules([month_rule])
+    assert [e.text for e in nlp(text).ents] == ["2021_03_04", "04 Sept 2021"]
+
+    timexy.remove_rule(rule.regex)
+    assert [e.text for e in nlp(text).ents] == ["04 Sept 2021"]
+    with pytest.raises(ValueError):
+        timexy.remove_rule(rule.regex)
+    # the rules changed by the component are not cached for the process
+    assert len(registry._compiled) == n_compiled
+    # the changed rules are pickled
+    timexy_unpickled = pickle.loads(pickle.dumps(timexy))
+    assert timexy_unpickled.date_scanner.patterns == timexy.date_scanner.patterns
+
+
+def test_load_rules_concurrently(monkeypatch: pytest.MonkeyPatch) -> None:
+    nlp = spacy.blank("en")
+    timexy = nlp.add_pipe("timexy")
+    timexy.add_rules(
+        [
+            Rule(
+                regex="(\\d{4})_(\\d{2})_(\\d{2})",
+                pattern="%Y_%m_%d",
+                tests=[("Invoice of 2021_03_04", 11, 21)],
+            )
+        ]
+    )
+    timexy_unpickled = pickle.loads(pickle.dumps(timexy))
+
+    # widen the window in which the threads load the rules at the same time
+    get_compiled = registry.get_compiled
+
+    def slow_get_compiled(*args: Any, **kwargs: Any) -> Any:
+        time.sleep(0.05)
+        return get_compiled(*args, **kwargs)
+
+    monkeypatch.setattr(registry, "get_compiled", slow_get_compiled)
+    patterns = []
+    threads = [
+        threading.Thread(
+            target=lambda: patterns.append(timexy_unpickled.date_scanner.patterns)
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # no thread falls back to the built-in rules
+    assert patterns == [timexy.date_scanner.patterns] * 8
+
+
+def test_swap_rules_concurrently() -> None:
+    nlp = spacy.blank("en")
+    timexy = nlp.add_pipe("timexy")
+    rule = Rule(
+        regex="(\\d{4})_(\\d{2})_(\\d{2})",
+        pattern="%Y_%m_%d",
+        tests=[("Invoice of 2021_03_04", 11, 21)],
+    )
+    texts = ["On 03.10.1993 and 1999_12_31 for 2 weeks"] * 2000
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.extend(
+            [e.text for e in doc.ents] for doc in nlp.pipe(texts, batch_size=10)
+        )
+    )
+    thread.start()
+    while thread.is_alive():
+        timexy.add_rules([rule])
+        timexy.remove_rule(rule.regex)
+    thread.join()
+
+    assert len(results) == len(texts)
+    assert all(
+        ents in (["03.10.1993", "2 weeks"], ["03.10.1993", "1999_12_31", "2 weeks"])
+        for ents in results
+    )
+
+
+def test_reannotate() -> None:
+    nlp = spacy.blank("en")
+    timexy = nlp.add_pipe("timexy", config={"structured": True})
+    text = (
+        "Founded on 03.10.1993, it moved on 10.10.2010 after 2 years. "
+        "It lasted for five days. " * 20
+    )
+    previous = nlp(text)
+    edits = [
+        # a changed date, a removed character and an appended sentence
+        (11, 21, "04.10.1993"),
+        (len(text) - 200, len(text) - 199, ""),
+        (len(text), len(text), " See you on 01.01.2022 for 3 weeks."),
+    ]
+    new_text = text
+    for start, end, replacement in reversed(edits):
+        new_text = new_text[:start] + replacement + new_text[end:]
+    expected = nlp(new_text)
+
+    for prev in [
+        previous,
+        [(e.start_char, e.end_char, e.kb_id_) for e in previous.ents],
+    ]:
+        doc = timexy.reannotate(nlp.make_doc(new_text), prev, edits)
+        assert [(e.start_char, e.end_char, e.kb_id_) for e in doc.ents] == [
+            (e.start_char, e.end_char, e.kb_id_) for e in expected.ents
+        ]
+        assert doc._.timexy.tolist() == expected._.timexy.tolist()
+
+    # entities of other labels are kept
+    doc = nlp.make_doc(new_text)
+    doc.ents = [Span(doc, 0, 1, label="ORG")]
+    doc = timexy.reannotate(doc, previous, edits)
+    assert doc.ents[0].label_ == "ORG" and len(doc.ents) == len(expected.ents) + 1
+
+    # entities of other components overlapping kept dates, resolved as in a full
+    # pass (e.g. dates of a NER run with timexy disabled)
+    for overwrite in (False, True):
+        timexy.overwrite = overwrite
+        docs = [nlp.make_doc(new_text), nlp.make_doc(new_text)]
+        for doc in docs:
+            doc.ents = [Span(doc, 2, 3, label="DATE")]
+        doc = timexy.reannotate(docs[0], previous, edits[1:])
+        expected_doc = timexy(docs[1])
+        assert [(e.start, e.end, e.label_, e.kb_id_) for e in doc.ents] == [
+            (e.start, e.end, e.label_, e.kb_id_) for e in expected_doc.ents
+        ]
+        assert doc._.timexy.tolist() == expected_doc._.timexy.tolist()
+    timexy.overwrite = False
+
+    with pytest.raises(ValueError):
+        timexy.reannotate(nlp.make_doc(new_text), previous, edits[:1])
+    with pytest.raises(ValueError):
+        timexy.reannotate(nlp.make_doc(text), [], [(5, 10, "abcde"), (8, 9, "x")])
+
+
+def test_reannotate_random_edits() -> None:
+    nlp = spacy.blank("en")
+    timexy = nlp.add_pipe("timexy", config={"structured": True})
+    pieces = ["03.10.1993", "Jan 1999", "2 years", "five days", "3 ", "1", "0."]
+    pieces += ["x", " ", ", "]
+    for seed in range(25):
+        rng = random.Random(seed)
+        text = "".join(rng.choice(pieces) for _ in range(60))
+        previous = nlp(text)
+        for _ in range(30):
+            start = rng.randint(0, len(text))
+            end = rng.randint(start, min(start + 12, len(text)))
+            replacement = rng.choice(pieces)
+            new_text = text[:start] + replacement + text[end:]
+
+            doc = timexy.reannotate(
+                nlp.make_doc(new_text), previous, [(start, end, replacement)]
+            )
+            expected = nlp(new_text)
+            assert [(e.start, e.end, e.kb_id_) for e in doc.ents] == [
+                (e.start, e.end, e.kb_id_) for e in expected.ents
+            ]
+            # no stale or duplicate records of replaced entities
+            if expected._.timexy is None:
+                assert doc._.timexy is None
+            else:
+                assert doc._.timexy.tolist() == expected._.timexy.tolist()
+            text, previous = new_text, doc
+
+
+def test_to_disk(tmp_path: Path) -> None:
+    nlp = spacy.blank("de")
+    nlp.add_pipe("timexy", config={"label": "date"})
+    text = "Heute ist der 03. Januar 1999, vor sechs Jahren und am 03.10.1993."
+    expected = [(e.start_char, e.end_char, e.label_, e.kb_id_) for e in nlp(text).ents]
+    nlp.to_disk(tmp_path)
+    rules_path = tmp_path / "timexy" / "rules"
+    assert srsly.read_json(rules_path)["version"] == registry.TABLE_VERSION
+
+    # the serialized rules are used without loading the language module
+    code = (
+        "import json, sys, spacy; from timexy import Timexy; "
+        f"nlp = spacy.load({str(tmp_path)!r}); "
+        f"ents = nlp({text!r}).ents; "
+        "assert 'timexy.languages.de' not in sys.modules; "
+        "print(json.dumps([[e.start_char, e.end_char, e.label_, e.kb_id_] for e in ents]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    )
+    assert [tuple(e) for e in json.loads(result.stdout)] == expected
+
+    # configuration changes take effect on load
+    cfg_path = tmp_path / "timexy" / "cfg"
+    srsly.write_json(
+        cfg_path, {**srsly.read_json(cfg_path), "label": "DATE", "prefilter": False}
+    )
+    timexy = spacy.load(tmp_path).get_pipe("timexy")
+    assert (timexy.label, timexy.cfg["label"], timexy.cue_regex) == (
+        "DATE",
+        "DATE",
+        None,
+    )
+    with pytest.raises(ValueError):
+        srsly.write_json(cfg_path, {"cache_size": -1})
+        spacy.load(tmp_path)
+
+    # rules of another version are compiled again from the language table
+    table = srsly.read_json(rules_path)
+    table["version"] = 0
+    table["language"]["rules"] = table["language"]["rules"][:1]
+    srsly.write_json(rules_path, table)
+    srsly.write_json(cfg_path, {})
+    timexy = spacy.load(tmp_path).get_pipe("timexy")
+    assert timexy.date_scanner.patterns == [table["language"]["rules"][0][1]]
+
+
+def test_profile() -> None:
+    texts = [
+        "Today is 03. January 1999, six years after 03.10.1993.",
+        "31.02.2020 for two weeks",
+        "No date here",
+    ]
+    nlp = spacy.blank("en")
+    nlp.add_pipe("timexy")
+    expected = [
+        [(e.start, e.end, e.kb_id_) for e in doc.ents] for doc in nlp.pipe(texts)
+    ]
+    # without profiling only the docs are counted
+    timexy = nlp.get_pipe("timexy")
+    assert (timexy.stats.n_docs, timexy.stats.rules[0].hits) == (3, 0)
+
+    candidates = {}
+    for scanner in ("anchored", "combined", "per_rule"):
+        nlp = spacy.blank("en")
+        timexy = nlp.add_pipe("timexy", config={"profile": True, "scanner": scanner})
+        for docs in (list(nlp.pipe(texts)), [nlp(text) for text in texts]):
+            assert [
+                [(e.start, e.end, e.kb_id_) for e in doc.ents] for doc in docs
+            ] == expected
+
+        stats = timexy.stats.to_dict()
+        assert (stats["n_docs"], stats["n_docs_skipped"]) == (6, 2)
+        assert stats["scan_time"] > 0
+        assert stats["matcher_time"] > 0
+        assert stats["commit_time"] > 0
+        rules = {r["pattern"]: r for r in stats["rules"]}
+        # 03.10.1993 and 31.02.2020, the latter is not a valid date
+        assert (rules["%d.%m.%Y"]["hits"], rules["%d.%m.%Y"]["parse_failures"]) == (
+            4,
+            2,
+        )
+        # January 1999 is dropped in favor of 03. January 1999
+        assert (rules["%B %Y"]["hits"], rules["%B %Y"]["dropped"]) == (2, 2)
+        assert (rules["%d. %B %Y"]["hits"], rules["%d. %B %Y"]["dropped"]) == (2, 0)
+        assert sum(r["scan_time"] for r in stats["rules"]) <= stats["scan_time"]
+        assert stats["durations"]["hits"] == 4
+        assert "%d.%m.%Y" in timexy.stats.summary()
+        candidates[scanner] = sum(r["candidates"] for r in stats["rules"])
+
+        timexy.stats.reset()
+        assert timexy.stats.n_docs == 0
+        assert timexy.stats.rules[0].to_dict() == {
+            "pattern": "%d.%m.%Y",
+            "scan_time": 0.0,
+            "candidates": 0,
+            "hits": 0,
+            "parse_failures": 0,
+            "dropped": 0,
+        }
+
+    # the anchored scanner only tries the rules around the hits of their anchors
+    assert 0 < candidates["anchored"] < candidates["combined"]
+    assert candidates["combined"] < candidates["per_rule"]
+
+
+def test_kb_id_cache() -> None:
+    texts = ["Due 03.10.1993 and 31.02.2020 in two weeks or 3 weeks"] * 3
+    nlp = spacy.blank("en")
+    timexy = nlp.add_pipe("timexy", config={"cache_size": 0})
+    assert timexy.kb_id_cache is None
+    expected = [
+        [(e.start, e.end, e.kb_id_) for e in doc.ents] for doc in nlp.pipe(texts)
+    ]
+
+    nlp = spacy.blank("en")
+    timexy = nlp.add_pipe("timexy", config={"profile": True})
+    docs = list(nlp.pipe(texts))
+    assert [[(e.start, e.end, e.kb_id_) for e in doc.ents] for doc in docs] == expected
+    info = timexy.kb_id_cache.info()
+    assert info["misses"] == info["currsize"] > 0
+    assert info["hits"] == 2 * info["misses"]
+    # parse failures are cached, but still counted
+    assert timexy.stats.rules[0].parse_failures == 3
+
+    with pytest.raises(ValueError):
+        Timexy(nlp, cache_size=-1)
+
+
+def test_lru_cache() -> None:
+    cache = util.LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", None)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    # b was the least recently used entry
+    assert cache.get("b", "missing") == "missing"
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.info() == {"hits": 3, "misses": 1, "maxsize": 2, "currsize": 2}
+    cache.clear()
+    assert cache.info() == {"hits": 0, "misses": 0, "maxsize": 2, "currsize": 0}
+
+
+def test_duration_lookup() -> None:
+    nlp = spacy.blank("en")
+    nlp.add_pipe("timexy")
+    doc = nlp("Six Weeks, 0 days, zero days, 2 Years and 3 years. Day 12 weeks")
+    assert [(e.text, e.kb_id_) for e in doc.ents] == [
+        ("Six Weeks", 'TIMEX3 type="DURATION" value="P6W"'),
+        ("0 days", 'TIMEX3 type="DURATION" value="P0D"'),
+        ("3 years", 'TIMEX3 type="DURATION" value="P3Y"'),
+        ("12 weeks", 'TIMEX3 type="DURATION" value="P12W"'),
+    ]
+
+    # durations overlapping existing entities are only added with overwrite
+    for overwrite, expected in ((False, []), (True, ["six weeks"])):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("timexy", config={"overwrite": overwrite})
+        doc = nlp.make_doc("for six weeks")
+        doc.ents = [Span(doc, 2, 3, label="OTHER")]
+        assert [
+            e.text for e in nlp.get_pipe("timexy")(doc).ents if e.label_ == "timexy"
+        ] == expected
+    # docs too short for a duration
+    assert not nlp("one").ents and not nlp("").ents
+
+
+def test_structured() -> None:
+    nlp = spacy.blank("en")
+    nlp.add_pipe("timexy", config={"structured": True})
+    doc = nlp("Today is 03. January 1999, six years after 03.10.1993 for 2 weeks.")
+    assert doc._.timexy.tolist() == [
+        (2, 6, records.DATE, dt.date(1999, 1, 3).toordinal(), ""),
+        (7, 9, records.DURATION, 6, "Y"),
+        (10, 11, records.DATE, dt.date(1993, 10, 3).toordinal(), ""),
+        (12, 14, records.DURATION, 2, "W"),
+    ]
+    assert [(e.start, e.end) for e in doc.ents] == [
+        (r["start"], r["end"]) for r in doc._.timexy
+    ]
+    # the decoder yields the same values from the kb_id strings
+    decoded = records.decode_timex3([e.kb_id_ for e in doc.ents])
+    for field in ("type", "value", "unit"):
+        assert (decoded[field] == doc._.timexy[field]).all()
+
+    assert nlp("No date here")._.timexy is None
+    nlp = spacy.blank("en")
+    nlp.add_pipe("timexy")
+    assert nlp("Today is 03. January 1999")._.timexy is None
+
+
+def test_decode_timex3() -> None:
+    decoded = records.decode_timex3(
+        [
+            'TIMEX3 type="DATE" value="1990-01-01T00:00:00"',
+            "631152000.0",
+            'TIMEX3 type="DURATION" value="P6Y"',
+            "",
+            'TIMEX3 type="DURATION" value="P99999999999999999999W"',
+            'xTIMEX3 type="DATE" value="1990-01-01T00:00:00"',
+        ]
+    )
+    assert decoded[["type", "value", "unit"]].tolist() == [
+        (records.DATE, dt.date(1990, 1, 1).toordinal(), ""),
+        (records.UNKNOWN, 0, ""),
+        (records.DURATION, 6, "Y"),
+        (records.UNKNOWN, 0, ""),
+        (records.DURATION, records.UNKNOWN_COUNT, "W"),
+        (records.UNKNOWN, 0, ""),
+    ]
+    assert records.decode_timex3([]).shape == (0,)
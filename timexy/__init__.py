@@ -1 +1,27 @@
-from .timexy import Timexy  # noqa
+from importlib import import_module
+from typing import Any
+
+__all__ = ["AsyncExtractor", "AsyncPipeline", "Extractor", "Timex", "Timexy", "extract"]
+
+# Public names and the submodules defining them. The submodules are only imported
+# on first access, so importing timexy does not load spaCy or pydantic.
+_LAZY_ATTRS = {
+    "AsyncExtractor": "aio",
+    "AsyncPipeline": "aio",
+    "Extractor": "extractor",
+    "Timex": "extractor",
+    "Timexy": "timexy",
+    "extract": "extractor",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRS:
+        value = getattr(import_module(f".{_LAZY_ATTRS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + list(_LAZY_ATTRS))
@@ -0,0 +1,279 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .extractor import Extractor, Timex
+
+# the pipeline or extractor of a worker process
+_worker: Any = None
+
+
+def _init_pipeline(nlp: Any) -> None:
+    global _worker
+    _worker = nlp
+
+
+def _pipe_batch(texts: List[str]) -> List[bytes]:
+    # Docs are returned serialized, they are rebuilt with the vocab of the caller
+    return [doc.to_bytes() for doc in _worker.pipe(texts, batch_size=len(texts))]
+
+
+def _init_extractor(kwargs: Dict[str, Any]) -> None:
+    global _worker
+    _worker = Extractor(**kwargs)
+
+
+def _extract_batch(texts: List[str]) -> List[List[Timex]]:
+    return list(_worker.pipe(texts, batch_size=len(texts)))
+
+
+def _create_executor(
+    executor: str,
+    max_workers: int,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Tuple = (),
+) -> Executor:
+    if executor == "thread":
+        return ThreadPoolExecutor(max_workers)
+    if executor == "process":
+        return ProcessPoolExecutor(
+            max_workers, initializer=initializer, initargs=initargs
+        )
+    raise ValueError(f"Illegal argument for executor: {executor}")
+
+
+class MicroBatcher:
+    """
+    Coalesces single requests of coroutines into micro-batches processed in an
+    executor, so the event loop is never blocked by the extraction.
+
+    As soon as fewer than max_in_flight batches are processed, all waiting items
+    (at most max_batch_size) are dispatched as the next batch, so batches grow
+    with the load. With a max_delay > 0, a batch waits up to that many seconds
+    after its first item for more items. At most max_pending items wait for a
+    batch, further requests wait until there is room again (back-pressure).
+    Errors of process_batch or of the executor (e.g. a crashed worker process)
+    are raised to the callers of the batch.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        executor: Executor,
+        max_batch_size: int = 32,
+        max_delay: float = 0.0,
+        max_pending: int = 1024,
+        max_in_flight: int = 2,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError(f"Illegal argument for max_batch_size: {max_batch_size}")
+        if max_delay < 0:
+            raise ValueError(f"Illegal argument for max_delay: {max_delay}")
+        if max_pending < 1:
+            raise ValueError(f"Illegal argument for max_pending: {max_pending}")
+        if max_in_flight < 1:
+            raise ValueError(f"Illegal argument for max_in_flight: {max_in_flight}")
+        self.process_batch = process_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.max_in_flight = max_in_flight
+        # created on first use in the running event loop
+        self._queue: Optional[asyncio.Queue] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Process the item in the next batch and return its result.
+        """
+        if self._task is None:
+            self._queue = asyncio.Queue(self.max_pending)
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+            self._task = asyncio.ensure_future(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # wait for a free slot first, so requests arriving in the meantime are
+            # coalesced into the next batch
+            await self._in_flight.acquire()
+            batch: List[Tuple[Any, asyncio.Future]] = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.max_delay
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except BaseException:
+                # stopped by aclose while collecting, the items already taken from
+                # the queue are cancelled like the waiting ones
+                for _, future in batch:
+                    future.cancel()
+                raise
+
+            try:
+                result = loop.run_in_executor(
+                    self.executor, self.process_batch, [item for item, _ in batch]
+                )
+            except Exception as e:
+                # the executor rejects the batch, e.g. after a shutdown or a crashed
+                # worker process (BrokenProcessPool)
+                self._in_flight.release()
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            result.add_done_callback(partial(self._finish, batch))
+
+    def _finish(
+        self, batch: List[Tuple[Any, asyncio.Future]], result: asyncio.Future
+    ) -> None:
+        self._in_flight.release()
+        if result.cancelled():
+            exception: Optional[BaseException] = asyncio.CancelledError()
+        else:
+            exception = result.exception()
+        for idx, (_, future) in enumerate(batch):
+            # the caller may have been cancelled in the meantime
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result.result()[idx])
+
+    async def aclose(self) -> None:
+        """
+        Stop batching, cancel the waiting requests and shut down the executor.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            while not self._queue.empty():
+                self._queue.get_nowait()[1].cancel()
+            self._task = None
+        await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+
+class AsyncPipeline:
+    """
+    Async facade of a spaCy pipeline containing Timexy for asyncio services:
+    ``doc = await apipe(text)``. Texts of concurrent calls are processed together
+    with nlp.pipe in a thread or process pool, see MicroBatcher.
+
+    With processes, every worker gets a copy of the pipeline and the docs are
+    sent back serialized. A pipeline is not shared by several threads, so the
+    thread pool always has a single worker.
+    """
+
+    def __init__(
+        self,
+        nlp: Any,
+        executor: str = "thread",
+        max_workers: int = 1,
+        max_batch_size: int = 32,
+        max_delay: float = 0.0,
+        max_pending: int = 1024,
+    ) -> None:
+        self.nlp = nlp
+        self.executor = executor
+        if executor == "thread":
+            process_batch: Callable[[List[str]], List[Any]] = self._pipe
+            max_workers = 1
+        else:
+            process_batch = _pipe_batch
+        self.batcher = MicroBatcher(
+            process_batch,
+            _create_executor(executor, max_workers, _init_pipeline, (nlp,)),
+            max_batch_size=max_batch_size,
+            max_delay=max_delay,
+            max_pending=max_pending,
+            max_in_flight=2 * max_workers,
+        )
+
+    def _pipe(self, texts: List[str]) -> List[Any]:
+        return list(self.nlp.pipe(texts, batch_size=len(texts)))
+
+    async def __call__(self, text: str) -> Any:
+        doc = await self.batcher.submit(text)
+        if self.executor == "process":
+            from spacy.tokens import Doc
+
+            doc = Doc(self.nlp.vocab).from_bytes(doc)
+        return doc
+
+    async def aclose(self) -> None:
+        await self.batcher.aclose()
+
+    async def __aenter__(self) -> "AsyncPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+class AsyncExtractor:
+    """
+    Async facade of Extractor for asyncio services:
+    ``timexes = await aextract(text)``. Texts of concurrent calls are extracted
+    together in a thread or process pool, see MicroBatcher.
+    """
+
+    def __init__(
+        self,
+        lang: str = "en",
+        kb_id_type: str = "timex3",
+        timezone: str = "UTC",
+        executor: str = "thread",
+        max_workers: int = 1,
+        max_batch_size: int = 32,
+        max_delay: float = 0.0,
+        max_pending: int = 1024,
+    ) -> None:
+        kwargs = {"lang": lang, "kb_id_type": kb_id_type, "timezone": timezone}
+        # fail early for illegal arguments
+        self.extractor = Extractor(**kwargs)
+        if executor == "thread":
+            process_batch: Callable[[List[str]], List[Any]] = self._extract
+        else:
+            process_batch = _extract_batch
+        self.batcher = MicroBatcher(
+            process_batch,
+            _create_executor(executor, max_workers, _init_extractor, (kwargs,)),
+            max_batch_size=max_batch_size,
+            max_delay=max_delay,
+            max_pending=max_pending,
+            max_in_flight=2 * max_workers,
+        )
+
+    def _extract(self, texts: List[str]) -> List[List[Timex]]:
+        return list(self.extractor.pipe(texts, batch_size=len(texts)))
+
+    async def __call__(self, text: str) -> List[Timex]:
+        return await self.batcher.submit(text)
+
+    async def aclose(self) -> None:
+        await self.batcher.aclose()
+
+    async def __aenter__(self) -> "AsyncExtractor":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import IO, Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+import spacy
+from spacy.language import Language
+
+from .timexy import Timexy  # noqa: F401, registers the factory
+
+# (index, raw line) pairs of the input
+Batch = List[Tuple[int, str]]
+
+# fields of the output records, replacing those of the input records
+OUTPUT_FIELDS = ("idx", "ents")
+
+_nlp: Optional[Language] = None
+_cfg: Dict[str, Any] = {}
+# whether input fields replaced by output fields were reported in this process
+_warned_fields = False
+
+
+def build_pipeline(
+    lang: str, model: Optional[str], timexy_config: Dict[str, Any]
+) -> Language:
+    """
+    Load the spaCy pipeline (or create a blank one for the language) and add
+    the timexy component if it is not part of it yet, otherwise apply the
+    timexy_config to the components of the pipeline.
+    """
+    nlp = spacy.load(model) if model else spacy.blank(lang)
+    names = [
+        name for name, factory in nlp.pipe_factories.items() if factory == "timexy"
+    ]
+    if not names:
+        before = "ner" if "ner" in nlp.pipe_names else None
+        nlp.add_pipe("timexy", config=timexy_config, before=before)
+    for name in names:
+        timexy = nlp.get_pipe(name)
+        timexy._apply_cfg({**timexy.cfg, **timexy_config})
+    return nlp
+
+
+def _init_worker(args: Dict[str, Any]) -> None:
+    global _nlp, _cfg
+    _nlp = build_pipeline(args["lang"], args["model"], args["timexy_config"])
+    _cfg = args
+
+
+def _parse_record(line: str, text_key: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Return the fields and the text of a JSONL line, raises a ValueError for lines
+    that are not a JSON object with a text field.
+    """
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON ({e})")
+    if not isinstance(record, dict):
+        raise ValueError("not a JSON object")
+    text = record.pop(text_key, None)
+    if not isinstance(text, str):
+        raise ValueError(f"no text in field {text_key!r}")
+    return record, text
+
+
+def _process_batch(batch: Batch) -> Tuple[List[str], int, int]:
+    """
+    Annotate a batch of input lines and return the output lines, the number of
+    entities and the number of characters processed. Invalid JSONL lines are
+    skipped with a warning.
+    """
+    global _warned_fields
+    records = []
+    texts = []
+    for idx, line in batch:
+        if _cfg["format"] == "jsonl":
+            try:
+                record, text = _parse_record(line, _cfg["text_key"])
+            except ValueError as e:
+                print(f"Skipping line {idx + 1}: {e}", file=sys.stderr)
+                continue
+            replaced = [field for field in OUTPUT_FIELDS if field in record]
+            if replaced and not _warned_fields:
+                print(
+                    f"Fields {replaced} of line {idx + 1} (and possibly later lines) "
+                    f"are replaced in the output",
+                    file=sys.stderr,
+                )
+                _warned_fields = True
+        else:
+            record = {}
+            text = line.rstrip("\r\n")
+        records.append(
+            {
+                "idx": idx,
+                **{k: v for k, v in record.items() if k not in OUTPUT_FIELDS},
+            }
+        )
+        texts.append(text)
+
+    lines = []
+    n_ents = 0
+    for record, doc in zip(records, _nlp.pipe(texts, batch_size=len(texts))):
+        record["ents"] = [
+            {
+                "start_char": e.start_char,
+                "end_char": e.end_char,
+                "text": e.text,
+                "label": e.label_,
+                "kb_id": e.kb_id_,
+            }
+            for e in doc.ents
+        ]
+        n_ents += len(doc.ents)
+        lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+    return lines, n_ents, sum(len(text) for text in texts)
+
+
+def _read_batches(f: IO[str], batch_size: int) -> Iterator[Batch]:
+    lines = ((idx, line) for idx, line in enumerate(f) if line.strip())
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _process_parallel(
+    batches: Iterator[Batch], args: Dict[str, Any], n_process: int, ordered: bool
+) -> Iterator[Tuple[List[str], int, int]]:
+    """
+    Process the batches in a pool of worker processes. At most two batches per
+    process are in flight, so the memory use does not depend on the input size.
+    """
+    max_pending = 2 * n_process
+    with ProcessPoolExecutor(
+        n_process, initializer=_init_worker, initargs=(args,)
+    ) as executor:
+        if ordered:
+            queue: Deque[Future] = deque()
+            for batch in batches:
+                queue.append(executor.submit(_process_batch, batch))
+                if len(queue) >= max_pending:
+                    yield queue.popleft().result()
+            while queue:
+                yield queue.popleft().result()
+        else:
+            pending: Set[Future] = set()
+            for batch in batches:
+                pending.add(executor.submit(_process_batch, batch))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from (future.result() for future in done)
+            for future in pending:
+                yield future.result()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m timexy",
+        description="Extract dates and durations from a text or JSONL file (one "
+        "doc per line) and write the entities as JSONL.",
+    )
+    parser.add_argument(
+        "input", nargs="?", default="-", help="input file, - for stdin (default)"
+    )
+    parser.add_argument("-o", "--output", default="-", help="output file")
+    parser.add_argument(
+        "--format",
+        choices=["auto", "text", "jsonl"],
+        default="auto",
+        help="input format, auto detects JSONL by the file extension",
+    )
+    parser.add_argument(
+        "--text-key", default="text", help="field of the text in JSONL records"
+    )
+    parser.add_argument("--lang", default="en", help="language of a blank pipeline")
+    parser.add_argument("--model", help="spaCy pipeline to load instead")
+    parser.add_argument(
+        "--kb-id-type",
+        choices=["timex3", "timestamp"],
+        help="timex3 by default, overrides the setting of a timexy component of "
+        "the --model",
+    )
+    parser.add_argument(
+        "--timezone",
+        help="UTC by default, overrides the setting of a timexy component of the "
+        "--model",
+    )
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="write batches as soon as they are done (with --n-process > 1)",
+    )
+    args = parser.parse_args(argv)
+
+    input_format = args.format
+    if input_format == "auto":
+        input_format = "jsonl" if args.input.endswith(".jsonl") else "text"
+    worker_args = {
+        "lang": args.lang,
+        "model": args.model,
+        "timexy_config": {
+            key: value
+            for key, value in [
+                ("kb_id_type", args.kb_id_type),
+                ("timezone", args.timezone),
+            ]
+            if value is not None
+        },
+        "format": input_format,
+        "text_key": args.text_key,
+    }
+
+    f_in = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    f_out = (
+        sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    )
+    start = time.perf_counter()
+    n_docs = n_ents = n_chars = 0
+    try:
+        batches = _read_batches(f_in, args.batch_size)
+        if args.n_process > 1:
+            results = _process_parallel(
+                batches, worker_args, args.n_process, not args.unordered
+            )
+        else:
+            _init_worker(worker_args)
+            results = (_process_batch(batch) for batch in batches)
+        for lines, batch_ents, batch_chars in results:
+            f_out.writelines(lines)
+            n_docs += len(lines)
+            n_ents += batch_ents
+            n_chars += batch_chars
+    except BrokenPipeError:
+        # the reader of the output went away (e.g. head), stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if f_in is not sys.stdin:
+            f_in.close()
+        if f_out is not sys.stdout:
+            f_out.close()
+
+    seconds = time.perf_counter() - start
+    print(
+        f"Processed {n_docs} docs with {n_ents} entities in {seconds:.2f}s "
+        f"({n_docs / seconds:.0f} docs/s, {n_chars / seconds / 1e6:.2f} M chars/s)",
+        file=sys.stderr,
+    )
@@ -0,0 +1,251 @@
+import codecs
+import mmap
+import os
+import re
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+from . import registry, util
+from .language import load_language
+
+
+class Timex(NamedTuple):
+    start_char: int
+    end_char: int
+    text: str
+    kb_id: str
+
+
+class Extractor:
+    """
+    Extracts and normalizes dates and durations from raw strings without spaCy.
+
+    Uses the same rules and normalization as the Timexy component. As there are no
+    tokens, a match is only accepted if it does not start or end inside a word and
+    overlapping matches are resolved by their number of whitespace-separated words.
+    """
+
+    def __init__(
+        self, lang: str = "en", kb_id_type: str = "timex3", timezone: str = "UTC"
+    ) -> None:
+        if kb_id_type not in ("timex3", "timestamp"):
+            raise ValueError(f"Illegal argument for kb_id_type: {kb_id_type}")
+        self.lang = lang
+        self.kb_id_type = kb_id_type
+        self.timezone = timezone
+        self.tz = util.get_timezone(timezone)
+        self.timexy_lang = load_language(lang)
+        compiled = registry.get_compiled(self.timexy_lang)
+        self.date_scanner = compiled.date_scanner
+        self.duration_scanner = compiled.duration_scanner
+        self.cue_regex = compiled.cue_regex
+
+    def __call__(self, text: str) -> List[Timex]:
+        return next(self.pipe([text]))
+
+    def pipe(
+        self, texts: Iterable[str], batch_size: int = 128
+    ) -> Iterator[List[Timex]]:
+        batch: List[str] = []
+        for text in texts:
+            batch.append(text)
+            if len(batch) == batch_size:
+                yield from self._process_batch(batch)
+                batch = []
+        if batch:
+            yield from self._process_batch(batch)
+
+    def _process_batch(self, texts: List[str]) -> Iterator[List[Timex]]:
+        # skip texts without any digit, month or unit string
+        has_cues = [
+            self.cue_regex is None or bool(self.cue_regex.search(text))
+            for text in texts
+        ]
+        date_matches = iter(
+            self.date_scanner.scan_texts([t for t, c in zip(texts, has_cues) if c])
+        )
+        for text, c in zip(texts, has_cues):
+            if not c:
+                yield []
+                continue
+            yield self._normalize(
+                text,
+                next(date_matches),
+                self.duration_scanner.scan(text),
+            )
+
+    def _normalize(
+        self,
+        text: str,
+        date_matches: List[Tuple[int, int, int, re.Match]],
+        durations: List[Tuple[int, int, Union[int, str], str]],
+        offset: int = 0,
+    ) -> List[Timex]:
+        """
+        Turn the (rule index, start, end, match) date matches and the durations
+        found in the text into Timex tuples, with offset added to their
+        character offsets.
+        """
+        timexes = []
+        for rule_idx, start, end, m in date_matches:
+            if not _is_word_boundary(text, start, end):
+                continue
+            d = self.date_scanner.to_date(rule_idx, m)
+            if d is not None:
+                timexes.append(
+                    (start, end, util.get_date_kb_id(d, self.kb_id_type, self.tz))
+                )
+        for start, end, cnt, unit in durations:
+            timexes.append((start, end, util.get_duration_kb_id(cnt, unit)))
+
+        return [
+            Timex(start + offset, end + offset, text[start:end], kb_id)
+            for start, end, kb_id in _resolve_overlaps(text, timexes)
+        ]
+
+    def extract_file(
+        self,
+        path: Union[str, Path],
+        chunk_size: int = 1 << 20,
+        encoding: str = "utf-8",
+    ) -> Iterator[Timex]:
+        """
+        Extract dates and durations from a text file of any size, yielding Timex
+        tuples with character offsets relative to the whole file.
+
+        The file is memory-mapped and decoded in chunks of chunk_size bytes. It is
+        scanned in windows of about chunk_size characters which reach further by
+        the longest possible match, so dates at a window boundary are found. Each
+        window ends at a position no match crosses and the next one starts there,
+        so every match is found and its overlaps are resolved exactly once. Only
+        the current window is kept in memory.
+        """
+        overlap = max(
+            self.date_scanner.max_match_len, self.duration_scanner.max_match_len
+        )
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                decoder = codecs.getincrementaldecoder(encoding)()
+                # decoded text starting at the character offset buffer_start, the
+                # text before pos has been processed
+                buffer = ""
+                buffer_start = 0
+                pos = 0
+                byte_pos = 0
+                min_len = chunk_size + 2 * overlap
+                while True:
+                    while byte_pos < len(mm) and len(buffer) - pos < min_len:
+                        buffer += decoder.decode(
+                            mm[byte_pos : byte_pos + chunk_size],
+                            final=byte_pos + chunk_size >= len(mm),
+                        )
+                        byte_pos += chunk_size
+                        _release(mm, byte_pos)
+                    eof = byte_pos >= len(mm)
+                    if pos >= len(buffer):
+                        return
+
+                    date_matches = self.date_scanner.scan_anchored(buffer, pos=pos)
+                    durations = self.duration_scanner.scan(buffer, pos=pos)
+                    if eof:
+                        cut = len(buffer)
+                    else:
+                        # end the window at the first position after the chunk
+                        # that no match crosses
+                        cut = pos + chunk_size
+                        spans = sorted(
+                            [m.span() for _, m in date_matches]
+                            + [(start, end) for start, end, _, _ in durations]
+                        )
+                        for start, end in spans:
+                            if start >= cut:
+                                break
+                            cut = max(cut, end)
+                        if cut + overlap > len(buffer):
+                            # a chain of overlapping matches, read further
+                            min_len += chunk_size
+                            continue
+
+                    yield from self._normalize(
+                        buffer,
+                        [
+                            (rule_idx, *m.span(), m)
+                            for rule_idx, m in date_matches
+                            if m.start() < cut
+                        ],
+                        [d for d in durations if d[0] < cut],
+                        buffer_start,
+                    )
+                    # keep a character before the next window for the lookbehinds
+                    drop = cut - 1 if cut > 0 else 0
+                    buffer = buffer[drop:]
+                    buffer_start += drop
+                    pos = cut - drop
+                    min_len = chunk_size + 2 * overlap
+
+
+def _release(mm: mmap.mmap, end: int) -> None:
+    """
+    Tell the OS that the mapped pages before end are not needed anymore, so the
+    resident memory does not grow with the file size.
+    """
+    if hasattr(mm, "madvise") and hasattr(mmap, "MADV_DONTNEED"):  # Python >= 3.8
+        end -= end % mmap.PAGESIZE
+        if end > 0:
+            mm.madvise(mmap.MADV_DONTNEED, 0, min(end, len(mm)))
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    if end < len(text):
+        # if next character is a digit this is likely not a date (as in Timexy)
+        if text[end].isdigit():
+            return False
+        if text[end - 1].isalnum() and text[end].isalnum():
+            return False
+    return start == 0 or not (text[start - 1].isalnum() and text[start].isalnum())
+
+
+def _resolve_overlaps(
+    text: str, timexes: List[Tuple[int, int, str]]
+) -> List[Tuple[int, int, str]]:
+    """
+    Keep the longest (in words) of overlapping matches, the later one for matches
+    of equal length, and return the remaining ones ordered by position.
+    """
+    ents: List[Tuple[int, int, str, int]] = []
+    ent_starts: List[int] = []
+    for start, end, kb_id in timexes:
+        n_words = len(text[start:end].split())
+        first_idx = max(bisect_left(ent_starts, start) - 1, 0)
+        last_idx = bisect_left(ent_starts, end, lo=first_idx)
+        overlap_idxs = [
+            idx
+            for idx in range(first_idx, last_idx)
+            if ents[idx][0] < end and ents[idx][1] > start
+        ]
+        if any(ents[idx][3] > n_words for idx in overlap_idxs):
+            continue
+        for idx in reversed(overlap_idxs):
+            del ents[idx]
+            del ent_starts[idx]
+        insert_idx = bisect_left(ent_starts, start)
+        ents.insert(insert_idx, (start, end, kb_id, n_words))
+        ent_starts.insert(insert_idx, start)
+    return [(start, end, kb_id) for start, end, kb_id, _ in ents]
+
+
+def extract(
+    texts: Iterable[str],
+    lang: str = "en",
+    kb_id_type: str = "timex3",
+    batch_size: int = 128,
+    timezone: str = "UTC",
+) -> Iterator[List[Timex]]:
+    """
+    Extract dates and durations from raw strings. Yields a list of Timex tuples
+    (start_char, end_char, text, kb_id) per text.
+    """
+    return Extractor(lang, kb_id_type, timezone).pipe(texts, batch_size=batch_size)
@@ -1,9 +1,12 @@
 import itertools
-from typing import Dict, List, Tuple
+import re
+from importlib import import_module
+from importlib.util import find_spec
+from typing import Any, Dict, List, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
-from .rule import Rule
+from .rule import VALIDATE_RULES, Rule, construct
 
 
 class Language(BaseModel):
@@ -13,6 +16,84 @@ class Language(BaseModel):
     num_words: List[str]
     rules: List[Rule] = []
 
+    _month_idxs: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    def __init__(self, **data: Any) -> None:
+        super().__init__(**data)
+        self._build_month_tables()
+
+    @classmethod
+    def create(cls, **data: Any) -> "Language":
+        if VALIDATE_RULES:
+            return cls(**data)
+        timexy_lang = construct(cls, **data)
+        timexy_lang._build_month_tables()
+        return timexy_lang
+
+    def _build_month_tables(self) -> None:
+        """
+        Build the case-folded month string to month index lookup.
+        """
+        month_idxs: Dict[str, int] = {}
+        for month_idx, month_str in self.get_month_str_pairs():
+            month_idxs.setdefault(month_str.casefold(), month_idx)
+        self._month_idxs = month_idxs
+
+    @property
+    def month_idxs(self) -> Dict[str, int]:
+        return self._month_idxs
+
+    def to_table(self) -> Dict[str, Any]:
+        """
+        Return the language as compact plain data without the rule tests, e.g. to
+        pickle or serialize it.
+        """
+        return {
+            "lang": self.lang,
+            "months": self.months,
+            "units": self.units,
+            "num_words": self.num_words,
+            "rules": [[rule.regex, rule.pattern] for rule in self.rules],
+        }
+
+    @classmethod
+    def from_table(cls, table: Dict[str, Any]) -> "Language":
+        """
+        Rebuild a language from the output of to_table without validating it again.
+        """
+        timexy_lang = construct(
+            cls,
+            lang=table["lang"],
+            months=table["months"],
+            units=table["units"],
+            num_words=table["num_words"],
+            rules=[
+                construct(Rule, regex=regex, pattern=pattern, tests=[])
+                for regex, pattern in table["rules"]
+            ],
+        )
+        timexy_lang._build_month_tables()
+        return timexy_lang
+
+    def replace(self, **data: Any) -> "Language":
+        """
+        Return a copy of the language with the given fields replaced without
+        validating it again.
+        """
+        timexy_lang = construct(
+            type(self),
+            **{
+                "lang": self.lang,
+                "months": self.months,
+                "units": self.units,
+                "num_words": self.num_words,
+                "rules": self.rules,
+                **data,
+            },
+        )
+        timexy_lang._build_month_tables()
+        return timexy_lang
+
     def get_month_re(self) -> str:
         return "|".join(
             itertools.chain(
@@ -21,8 +102,41 @@ class Language(BaseModel):
             )
         )
 
+    def get_cue_re(self) -> str:
+        """
+        Return a regex matching the cues every date or duration contains: a digit,
+        a month string or a unit string.
+        """
+        return "|".join(
+            itertools.chain(
+                ["\\d"],
+                (re.escape(m) for m in itertools.chain.from_iterable(self.months)),
+                (
+                    re.escape(u)
+                    for u in itertools.chain.from_iterable(self.units.values())
+                ),
+            )
+        )
+
     def get_month_str_pairs(self) -> List[Tuple[int, str]]:
         month_str_pairs = []
         for month_idx, month_strs in enumerate(self.months):
             month_str_pairs.extend([(month_idx + 1, m) for m in month_strs])
         return month_str_pairs
+
+
+def load_language(lang: str) -> Language:
+    try:
+        return getattr(import_module(f"timexy.languages.{lang}"), lang)
+    except Exception:
+        raise NameError(f"Language {lang} not supported by timexy")
+
+
+def is_supported(lang: str) -> bool:
+    """
+    Return whether timexy ships rules for the language without loading them.
+    """
+    try:
+        return find_spec(f"timexy.languages.{lang}") is not None
+    except (ImportError, ValueError):
+        return False
@@ -1,7 +1,7 @@
 from ..language import Language
 from ..rule import Rule
 
-de = Language(
+de = Language.create(
     lang="de",
     units={
         "Y": ["Jahr", "Jahre", "Jahren"],
@@ -48,37 +48,37 @@ de = Language(
     ],
 )
 de.rules = [
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)\\.(1[0-2]|0?\\d)\\.([12]\\d{3})",
         pattern="%d.%m.%Y",
         tests=[("Heute ist 03.10.1999", 10, 20)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)\\.(1[0-2]|0?\\d)\\.(\\d{2})",
         pattern="%d.%m.%y",
         tests=[("Heute ist 03.10.99", 10, 18)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)/(1[0-2]|0?\\d)/([12]\\d{3})",
         pattern="%d/%m/%Y",
         tests=[("Heute ist 03/10/1999", 10, 20)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)/(1[0-2]|0?\\d)/(\\d{2})",
         pattern="%d/%m/%y",
         tests=[("Heute ist 03/10/99", 10, 18)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)-(1[0-2]|0?\\d)-(\\d{2})",
         pattern="%d-%m-%y",
         tests=[("Heute ist 03-10-99", 10, 18)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)-(1[0-2]|0?\\d)-([12]\\d{3})",
         pattern="%d-%m-%Y",
         tests=[("Heute ist 03-10-1999", 10, 20)],
     ),
-    Rule(
+    Rule.create(
         regex=f"([0-2]?\\d|30|31)\\.\\s+({de.get_month_re()})\\s+([12]\\d{{3}})",
         pattern="%d. %b %Y",
         tests=[
@@ -86,17 +86,17 @@ de.rules = [
             ("Heute ist 03. Jan 1999", 10, 22),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"([0-2]?\\d|30|31)\\.\\s+({de.get_month_re()})\\s+(\\d{{2}})",
         pattern="%d. %B %y",
         tests=[("Heute ist 03. Januar 99", 10, 23), ("Heute ist 03. Jan 99", 10, 20)],
     ),
-    Rule(
+    Rule.create(
         regex=f"({de.get_month_re()})\\s+([12]\\d{{3}})",
         pattern="%B %Y",
         tests=[("Heute ist Januar 1999", 10, 21), ("Heute ist Jan 1999", 10, 18)],
     ),
-    Rule(
+    Rule.create(
         regex=f"({de.get_month_re()})\\s+(\\d{{2}})",
         pattern="%B %y",
         tests=[("Heute ist Januar 99", 10, 19), ("Heute ist Jan 99", 10, 16)],
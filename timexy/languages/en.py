@@ -1,7 +1,7 @@
 from ..language import Language
 from ..rule import Rule
 
-en = Language(
+en = Language.create(
     lang="en",
     units={
         "Y": ["year", "years"],
@@ -49,52 +49,52 @@ en = Language(
 )
 
 en.rules = [
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)\\.(1[0-2]|0?\\d)\\.([12]\\d{3})",
         pattern="%d.%m.%Y",
         tests=[("Today is 03.10.1999", 9, 19)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)\\.(1[0-2]|0?\\d)\\.(\\d{2})",
         pattern="%d.%m.%y",
         tests=[("Today is 03.10.99", 9, 17), ("Today is 3.10.99", 9, 16)],
     ),
-    Rule(
+    Rule.create(
         regex="([0-2]?\\d|30|31)/(1[0-2]|0?\\d)/([12]\\d{3})",
         pattern="%d/%m/%Y",
         tests=[("Today is 03/10/1999", 9, 19), ("Today is 3/10/1999", 9, 18)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)/(1[0-2]|0?\\d)/(\\d{2})",
         pattern="%d/%m/%y",
         tests=[("Today is 03/10/99", 9, 17), ("Today is 3/10/99", 9, 16)],
     ),
-    Rule(
+    Rule.create(
         regex=f"([0-2]?\\d|30|31)/({en.get_month_re()})/(\\d{{2}})",
         pattern="%d/%b/%y",
         tests=[("Today is 03/Feb/99", 9, 18), ("Today is 3/Feb/99", 9, 17)],
     ),
-    Rule(
+    Rule.create(
         regex=f"([0-2]?\\d|30|31)/({en.get_month_re()})/([12]\\d{{3}})",
         pattern="%d/%b/%Y",
         tests=[("Today is 03/Feb/1999", 9, 20), ("Today is 3/Feb/1999", 9, 19)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([12]\\d{3})/(1[0-2]|0?\\d)/([0-2]?\\d|30|31)",
         pattern="%Y/%m/%d",
         tests=[("Today is 1999/10/03", 9, 19), ("Today is 1999/10/3", 9, 18)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)-(1[0-2]|0?\\d)-([12]\\d{3})",
         pattern="%d-%m-%Y",
         tests=[("Today is 03-10-1999", 9, 19), ("Today is 3-10-1999", 9, 18)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)-(1[0-2]|0?\\d)-(\\d{2})",
         pattern="%d-%m-%y",
         tests=[("Today is 03-10-99", 9, 17), ("Today is 3-10-99", 9, 16)],
     ),
-    Rule(
+    Rule.create(
         regex=f"([0-2]?\\d|30|31)-({en.get_month_re()})-(\\d{{2}})",
         pattern="%d-%b-%y",
         tests=[
@@ -103,7 +103,7 @@ en.rules = [
             ("Today is 3-FEB-99", 9, 17),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"([0-2]?\\d|30|31)-({en.get_month_re()})-([12]\\d{{3}})",
         pattern="%d-%b-%Y",
         tests=[
@@ -112,7 +112,7 @@ en.rules = [
             ("Today is 3-FEB-1999", 9, 19),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"([12]\\d{{3}})-({en.get_month_re()})-([0-2]?\\d|30|31)",
         pattern="%Y-%b-%d",
         tests=[
@@ -121,12 +121,12 @@ en.rules = [
             ("Today is 2018-Jun-4", 9, 19),
         ],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([12]\\d{3})-(1[0-2]|0?\\d)-([0-2]?\\d|30|31)",
         pattern="%Y-%m-%d",
         tests=[("Today is 1999-10-03", 9, 19), ("Today is 1999-10-3", 9, 18)],
     ),
-    Rule(
+    Rule.create(
         regex=f"([0-2]?\\d|30|31)\\.\\s+({en.get_month_re()})\\s+([12]\\d{{3}})",
         pattern="%d. %B %Y",
         tests=[
@@ -138,7 +138,7 @@ en.rules = [
             ("Today is 3. JAN 1999", 9, 20),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"([0-2]?\\d|30|31)\\.\\s+({en.get_month_re()})\\s+(\\d{{2}})",
         pattern="%d. %B %y",
         tests=[
@@ -150,7 +150,7 @@ en.rules = [
             ("Today is 3. JAN 99", 9, 18),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"([0-2]?\\d|30|31)\\s+({en.get_month_re()})\\s+([12]\\d{{3}})",
         pattern="%d %b %Y",
         tests=[
@@ -162,7 +162,7 @@ en.rules = [
             ("Today is 3 JANUARY 1999", 9, 23),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"([0-2]?\\d|30|31)\\s+({en.get_month_re()})\\s+(\\d{{2}})",
         pattern="%d %b %y",
         tests=[
@@ -174,7 +174,7 @@ en.rules = [
             ("Today is 3 JANUARY 99", 9, 21),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"({en.get_month_re()})\\s+([12]\\d{{3}})",
         pattern="%B %Y",
         tests=[
@@ -184,7 +184,7 @@ en.rules = [
             ("Today is JAN 1999", 9, 17),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"({en.get_month_re()})\\s+(\\d{{2}})",
         pattern="%B %y",
         tests=[
@@ -194,7 +194,7 @@ en.rules = [
             ("Today is JAN 99", 9, 15),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"({en.get_month_re()})\\s([0-2]?\\d|30|31)\\,\\s+([12]\\d{{3}})",
         pattern="%b %d, %Y",
         tests=[
@@ -204,7 +204,7 @@ en.rules = [
             ("Today is JANUARY 03, 1999", 9, 25),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"({en.get_month_re()})\\s([0-2]?\\d|30|31)\\s+([12]\\d{{3}})",
         pattern="%b %d %Y",
         tests=[
@@ -1,7 +1,7 @@
 from ..language import Language
 from ..rule import Rule
 
-fr = Language(
+fr = Language.create(
     lang="fr",
     units={
         "Y": ["an", "ans", "années"],
@@ -48,37 +48,37 @@ fr = Language(
     ],
 )
 fr.rules = [
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)\\.(1[0-2]|0?\\d)\\.([12]\\d{3})",
         pattern="%d.%m.%Y",
         tests=[("Nous sommes le 03.10.1990", 15, 25)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)\\.(1[0-2]|0?\\d)\\.(\\d{2})",
         pattern="%d.%m.%y",
         tests=[("Nous sommes le 03.10.99", 15, 23)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)/(1[0-2]|0?\\d)/([12]\\d{3})",
         pattern="%d/%m/%Y",
         tests=[("Nous sommes le 03/10/1999", 15, 25)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)/(1[0-2]|0?\\d)/(\\d{2})",
         pattern="%d/%m/%y",
         tests=[("Nous sommes le 03/10/99", 15, 23)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)-(1[0-2]|0?\\d)-(\\d{2})",
         pattern="%d-%m-%y",
         tests=[("Nous sommes le 03-10-99", 15, 23)],
     ),
-    Rule(
+    Rule.create(
         regex="(?<![0-9])([0-2]?\\d|30|31)-(1[0-2]|0?\\d)-([12]\\d{3})",
         pattern="%d-%m-%Y",
         tests=[("Nous sommes le 03-10-1999", 15, 25)],
     ),
-    Rule(
+    Rule.create(
         regex=f"([0-2]?\\d|30|31)\\s+({fr.get_month_re()})\\s+([12]\\d{{3}})",
         pattern="%d %b %Y",
         tests=[
@@ -87,7 +87,7 @@ fr.rules = [
             ("Nous sommes le 10 mai 2021 semaines", 15, 26),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"([0-2]?\\d|30|31)\\s+({fr.get_month_re()})\\s+(\\d{{2}})",
         pattern="%d %B %y",
         tests=[
@@ -95,7 +95,7 @@ fr.rules = [
             ("Nous sommes le 03 jan 99", 15, 24),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"({fr.get_month_re()})\\s+([12]\\d{{3}})",
         pattern="%B %Y",
         tests=[
@@ -103,7 +103,7 @@ fr.rules = [
             ("Nous sommes en jan 1999", 15, 23),
         ],
     ),
-    Rule(
+    Rule.create(
         regex=f"({fr.get_month_re()})\\s+(\\d{{2}})",
         pattern="%B %y",
         tests=[
@@ -0,0 +1,83 @@
+import datetime as dt
+import re
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+# type codes of the records
+DATE = 1
+DURATION = 2
+UNKNOWN = 0
+
+# structured annotations of a doc, one row per entity: the token offsets, the type
+# code and the date ordinal (DATE) or the count and unit of a duration (DURATION)
+TIMEX_DTYPE = np.dtype(
+    [
+        ("start", np.int32),
+        ("end", np.int32),
+        ("type", np.uint8),
+        ("value", np.int64),
+        ("unit", "U1"),
+    ]
+)
+
+# counts of durations that do not fit the value field
+UNKNOWN_COUNT = -1
+
+_INT64_MAX = np.iinfo(np.int64).max
+# date ordinal of the epoch of datetime64
+_EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+
+_TIMEX3_RE = re.compile(
+    'TIMEX3 type="(?:DATE" value="(\\d{4}-\\d\\d-\\d\\d)T[^"]*'
+    '|DURATION" value="P(\\d+)([A-Z]))"'
+)
+
+
+def to_records(rows: List[Tuple[int, int, int, int, str]]) -> np.ndarray:
+    """
+    Build the records from (start, end, type, value, unit) rows.
+    """
+    return np.array(rows, dtype=TIMEX_DTYPE)
+
+
+def duration_count(cnt: str) -> int:
+    """
+    Return the count of a duration given as digits as it is stored in the records.
+    """
+    return int(cnt) if len(cnt) < 19 or int(cnt) <= _INT64_MAX else UNKNOWN_COUNT
+
+
+def decode_timex3(kb_ids: Iterable[str]) -> np.ndarray:
+    """
+    Decode TIMEX3 kb_id strings into records (without token offsets) at once,
+    e.g. for annotations stored as strings. kb_ids that are no TIMEX3 date or
+    duration, such as timestamps, get the type UNKNOWN.
+    """
+    kb_ids = list(kb_ids)
+    records = np.zeros(len(kb_ids), dtype=TIMEX_DTYPE)
+    date_idxs, dates, duration_idxs, counts, units = [], [], [], [], []
+    match = _TIMEX3_RE.fullmatch
+    for idx, kb_id in enumerate(kb_ids):
+        m = match(kb_id)
+        if m is None:
+            continue
+        date, cnt, unit = m.groups()
+        if date:
+            date_idxs.append(idx)
+            dates.append(date)
+        else:
+            duration_idxs.append(idx)
+            counts.append(duration_count(cnt))
+            units.append(unit)
+
+    if dates:
+        records["type"][date_idxs] = DATE
+        records["value"][date_idxs] = (
+            np.array(dates, dtype="datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+        )
+    if counts:
+        records["type"][duration_idxs] = DURATION
+        records["value"][duration_idxs] = counts
+        records["unit"][duration_idxs] = units
+    return records
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import re
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .language import Language, load_language
+from .scanner import DateScanner, DurationScanner
+
+# version of the format of CompiledLanguage.to_table, increased whenever the
+# compiled tables change so outdated tables are compiled again
+TABLE_VERSION = 5
+
+
+class CompiledLanguage:
+    """
+    The compiled rules of a language, shared by all Timexy components and
+    extractors of the process that use the same language and rule set.
+    """
+
+    def __init__(
+        self, timexy_lang: Language, previous: Optional["CompiledLanguage"] = None
+    ) -> None:
+        """
+        Compile the rules of the language. If the compiled rules of a previous
+        version of the language are given, only what changed is compiled again.
+        """
+        self.timexy_lang = timexy_lang
+        if previous is None:
+            self.date_scanner = DateScanner(timexy_lang.rules, timexy_lang.month_idxs)
+        else:
+            self.date_scanner = previous.date_scanner.update(
+                timexy_lang.rules, timexy_lang.month_idxs
+            )
+        if (
+            previous is not None
+            and previous.timexy_lang.units == timexy_lang.units
+            and previous.timexy_lang.num_words == timexy_lang.num_words
+        ):
+            self.duration_scanner = previous.duration_scanner
+        else:
+            self.duration_scanner = DurationScanner(
+                timexy_lang.units, timexy_lang.num_words
+            )
+
+        # every rule needs a directive for the cues to be present in all its dates
+        self.cue_regex: Optional[re.Pattern] = None
+        if all(rule.get_date_groups() for rule in timexy_lang.rules):
+            self.cue_regex = re.compile(timexy_lang.get_cue_re(), re.IGNORECASE)
+
+    def to_table(self) -> Dict[str, Any]:
+        """
+        Return the compiled rules as versioned plain data: the language table, the
+        month tables and rule analysis of the date scanner, the duration vocabulary
+        and the cue regex.
+        """
+        return {
+            "version": TABLE_VERSION,
+            "language": self.timexy_lang.to_table(),
+            "date_scanner": self.date_scanner.to_table(),
+            "duration_scanner": self.duration_scanner.to_table(),
+            "cue_re": self.cue_regex.pattern if self.cue_regex else None,
+        }
+
+    @classmethod
+    def from_table(
+        cls, table: Dict[str, Any], timexy_lang: Optional[Language] = None
+    ) -> "CompiledLanguage":
+        """
+        Rebuild the compiled rules from the output of to_table without analyzing
+        the rules again. Raises a ValueError for tables of another version.
+        """
+        if table.get("version") != TABLE_VERSION:
+            raise ValueError(
+                f"Unsupported version of the compiled rules: {table.get('version')}"
+            )
+        compiled = cls.__new__(cls)
+        compiled.timexy_lang = timexy_lang or Language.from_table(table["language"])
+        compiled.date_scanner = DateScanner.from_table(table["date_scanner"])
+        compiled.duration_scanner = DurationScanner.from_table(
+            table["duration_scanner"]
+        )
+        compiled.cue_regex = (
+            re.compile(table["cue_re"], re.IGNORECASE) if table["cue_re"] else None
+        )
+        return compiled
+
+
+_compiled: Dict[Tuple[str, str], CompiledLanguage] = {}
+_lock = threading.Lock()
+
+
+def _fingerprint(timexy_lang: Language) -> str:
+    table = json.dumps(timexy_lang.to_table(), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(table.encode("utf-8")).hexdigest()
+
+
+def get_compiled(
+    timexy_lang: Language,
+    table: Optional[Dict[str, Any]] = None,
+    previous: Optional[CompiledLanguage] = None,
+) -> CompiledLanguage:
+    """
+    Return the compiled rules of the language, compiling them on first use. The
+    cache is keyed by the language code and a fingerprint of the rules, months,
+    units and number words, so changed rules are compiled again. If given, the
+    compiled rules are rebuilt from the table (see CompiledLanguage.to_table) of
+    the language or compiled incrementally from the previous compiled rules. The
+    latter are rules changed by a single component and are not cached, so they
+    are freed with the component.
+    """
+    key = (timexy_lang.lang, _fingerprint(timexy_lang))
+    compiled = _compiled.get(key)
+    if compiled is None and previous is not None:
+        return CompiledLanguage(timexy_lang, previous)
+    if compiled is None:
+        with _lock:
+            compiled = _compiled.get(key)
+            if compiled is None:
+                compiled = _compiled[key] = (
+                    CompiledLanguage.from_table(table, timexy_lang)
+                    if table is not None
+                    else CompiledLanguage(timexy_lang)
+                )
+    return compiled
+
+
+def warmup(langs: Iterable[str]) -> None:
+    """
+    Compile the built-in rules of the given languages ahead of first use.
+    """
+    for lang in langs:
+        get_compiled(load_language(lang))
+
+
+def clear() -> None:
+    """
+    Drop all compiled languages of the process.
+    """
+    with _lock:
+        _compiled.clear()
@@ -1,9 +1,71 @@
-from typing import List, Tuple
+import os
+import re
+from typing import Any, Dict, List, Tuple, Type, TypeVar
 
 from pydantic import BaseModel
 
+# Set TIMEXY_VALIDATE_RULES=0 to skip validating the built-in languages and rules
+# when they are loaded, e.g. in production
+VALIDATE_RULES = os.environ.get("TIMEXY_VALIDATE_RULES", "1") != "0"
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def construct(model_cls: Type[Model], **data: Any) -> Model:
+    """
+    Create a model instance from trusted data without validating it.
+    """
+    model_construct = getattr(model_cls, "model_construct", None)
+    if model_construct is None:  # pydantic < 2
+        model_construct = model_cls.construct
+    return model_construct(**data)
+
+
+# date components of the supported strptime directives
+DATE_DIRECTIVES = {
+    "d": "day",
+    "m": "month",
+    "b": "month_str",
+    "B": "month_str",
+    "y": "short_year",
+    "Y": "year",
+}
+
 
 class Rule(BaseModel):
     regex: str
     pattern: str
     tests: List[Tuple[str, int, int]]
+
+    @classmethod
+    def create(cls, **data: Any) -> "Rule":
+        if VALIDATE_RULES:
+            return cls(**data)
+        return construct(cls, **data)
+
+    def get_date_groups(self) -> Dict[str, int]:
+        """
+        Map the date components of the pattern to the regex groups capturing them,
+        e.g. {"day": 1, "month": 2, "year": 3} for the pattern %d.%m.%Y. The n-th
+        directive of the pattern is expected to be captured by the n-th group.
+        """
+        directives = re.findall("%(.)", self.pattern)
+        date_groups = {}
+        for group_idx, directive in enumerate(directives, start=1):
+            if directive not in DATE_DIRECTIVES:
+                raise ValueError(
+                    f"Unsupported directive %{directive} in pattern {self.pattern}"
+                )
+            date_groups[DATE_DIRECTIVES[directive]] = group_idx
+
+        if (
+            len(date_groups) != len(directives)
+            or ("month" in date_groups and "month_str" in date_groups)
+            or ("year" in date_groups and "short_year" in date_groups)
+        ):
+            raise ValueError(f"Ambiguous date components in pattern {self.pattern}")
+        if len(directives) != re.compile(self.regex).groups:
+            raise ValueError(
+                f"Number of groups in regex {self.regex} does not match the number of directives in pattern {self.pattern}"
+            )
+        return date_groups
@@ -0,0 +1,867 @@
+import calendar
+import datetime as dt
+import re
+from bisect import bisect_right
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .rule import Rule
+
+try:
+    from re import _parser as sre_parse  # type: ignore
+except ImportError:  # Python < 3.11
+    import sre_parse  # type: ignore
+
+# values accepted by strptime for the respective directives
+_DAY_RE = re.compile("3[0-1]|[1-2]\\d|0[1-9]|[1-9]| [1-9]")
+_MONTH_RE = re.compile("1[0-2]|0[1-9]|[1-9]")
+_YEAR_RE = re.compile("\\d\\d\\d\\d")
+_SHORT_YEAR_RE = re.compile("\\d\\d")
+
+# two-digit years below the pivot belong to the 21st century (as in strptime)
+SHORT_YEAR_PIVOT = 69
+
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+_CATEGORY_CLASSES = {
+    sre_parse.CATEGORY_DIGIT: "\\d",
+    sre_parse.CATEGORY_SPACE: "\\s",
+    sre_parse.CATEGORY_WORD: "\\w",
+}
+
+
+def _first_chars(items: List) -> Tuple[Optional[Set[str]], bool]:
+    """
+    Return the character class items a match of the parsed regex sequence can
+    start with and whether the sequence can match the empty string. A class of
+    None means that a match can start with any character.
+    """
+    first: Set[str] = set()
+    for op, av in items:
+        if op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT, sre_parse.AT):
+            # zero-width, the match starts with whatever follows
+            continue
+        if op is sre_parse.LITERAL:
+            first.add(re.escape(chr(av)))
+            return first, False
+        if op is sre_parse.IN:
+            for in_op, in_av in av:
+                if in_op is sre_parse.LITERAL:
+                    first.add(re.escape(chr(in_av)))
+                elif in_op is sre_parse.RANGE:
+                    first.add(f"{re.escape(chr(in_av[0]))}-{re.escape(chr(in_av[1]))}")
+                elif in_op is sre_parse.CATEGORY and in_av in _CATEGORY_CLASSES:
+                    first.add(_CATEGORY_CLASSES[in_av])
+                else:
+                    return None, False
+            return first, False
+        if op is sre_parse.SUBPATTERN:
+            if av[1] & re.IGNORECASE:
+                return None, False
+            sub_first, nullable = _first_chars(av[-1])
+        elif op is sre_parse.BRANCH:
+            sub_first, nullable = set(), False
+            for branch in av[1]:
+                branch_first, branch_nullable = _first_chars(branch)
+                if branch_first is None:
+                    return None, False
+                sub_first |= branch_first
+                nullable = nullable or branch_nullable
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            sub_first, nullable = _first_chars(av[2])
+            nullable = nullable or av[0] == 0
+        else:
+            return None, False
+        if sub_first is None:
+            return None, False
+        first |= sub_first
+        if not nullable:
+            return first, False
+    return first, True
+
+
+def max_match_len(regex: str, repeat_cap: int = 64) -> int:
+    """
+    Return the maximum length of a match of the regex including the characters
+    its lookarounds inspect, counting unbounded repeats (e.g. ``\\s+``) as at most
+    repeat_cap repetitions.
+    """
+    return _max_width(sre_parse.parse(regex).data, repeat_cap)
+
+
+def _max_width(items: List, repeat_cap: int) -> int:
+    width = 0
+    for op, av in items:
+        if op is sre_parse.SUBPATTERN:
+            width += _max_width(av[-1], repeat_cap)
+        elif op is sre_parse.BRANCH:
+            width += max(_max_width(branch, repeat_cap) for branch in av[1])
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            width += min(av[1], repeat_cap) * _max_width(av[2], repeat_cap)
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            width += _max_width(av[1], repeat_cap)
+        elif op is not sre_parse.AT:
+            # a single character (literal, class, any) or an unknown construct
+            width += 1 if op is not sre_parse.GROUPREF else repeat_cap
+    return width
+
+
+# anchors with more alternative strings are not considered, see literal_anchor
+MAX_ANCHOR_STRS = 256
+
+# (strings, min offset, max offset or None if unbounded) of the literal anchor of
+# a rule, see literal_anchor
+Anchor = Tuple[List[str], int, Optional[int]]
+
+
+def _width(items: List, repeat_cap: int) -> Tuple[int, int]:
+    """
+    Return the minimum and maximum number of characters the parsed regex sequence
+    consumes (lookarounds consume none), counting unbounded repeats as at most
+    repeat_cap repetitions.
+    """
+    min_width = max_width = 0
+    for op, av in items:
+        if op is sre_parse.SUBPATTERN:
+            item_min, item_max = _width(av[-1], repeat_cap)
+        elif op is sre_parse.BRANCH:
+            widths = [_width(branch, repeat_cap) for branch in av[1]]
+            item_min = min(width[0] for width in widths)
+            item_max = max(width[1] for width in widths)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            item_min, item_max = _width(av[2], repeat_cap)
+            item_min *= av[0]
+            item_max *= min(av[1], repeat_cap)
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT, sre_parse.AT):
+            item_min = item_max = 0
+        elif op is sre_parse.GROUPREF:
+            item_min, item_max = 0, repeat_cap
+        else:
+            item_min = item_max = 1
+        min_width += item_min
+        max_width += item_max
+    return min_width, max_width
+
+
+def _literal_strs(items: List) -> Optional[List[str]]:
+    """
+    Return all strings the parsed regex sequence can match if it only matches a
+    few literal strings (e.g. a month alternation), otherwise None.
+    """
+    strs = [""]
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            item_strs: Optional[List[str]] = [chr(av)]
+        elif op is sre_parse.IN and all(in_op is sre_parse.LITERAL for in_op, _ in av):
+            item_strs = [chr(in_av) for _, in_av in av]
+        elif op is sre_parse.SUBPATTERN and not (av[1] or av[2]):
+            item_strs = _literal_strs(av[-1])
+        elif op is sre_parse.BRANCH:
+            item_strs = []
+            for branch in av[1]:
+                branch_strs = _literal_strs(branch)
+                if branch_strs is None:
+                    return None
+                item_strs.extend(branch_strs)
+        else:
+            return None
+        if item_strs is None or len(strs) * len(item_strs) > MAX_ANCHOR_STRS:
+            return None
+        strs = [s + item_s for s in strs for item_s in item_strs]
+    return strs
+
+
+def _anchors(items: List, min_offset: int, max_offset: int) -> List[Anchor]:
+    """
+    Return the literal elements every match of the parsed regex sequence contains
+    with their offsets from the start of the match, the maximum offset is None if
+    an unbounded repeat precedes the element.
+    """
+    anchors = []
+    for op, av in items:
+        strs = _literal_strs([(op, av)])
+        if strs and all(strs):
+            anchors.append(
+                (
+                    sorted(set(strs)),
+                    min_offset,
+                    max_offset if max_offset < sre_parse.MAXREPEAT else None,
+                )
+            )
+        elif op is sre_parse.SUBPATTERN and not (av[1] or av[2]):
+            anchors.extend(_anchors(av[-1], min_offset, max_offset))
+        # unbounded repeats count as MAXREPEAT repetitions
+        item_min, item_max = _width([(op, av)], sre_parse.MAXREPEAT)
+        min_offset += item_min
+        max_offset += item_max
+    return anchors
+
+
+def literal_anchor(regex: str) -> Optional[Anchor]:
+    """
+    Return a literal anchor of the regex: the strings of which every match
+    contains one (e.g. a separator or the month names) together with the minimum
+    and maximum offset of that string from the start of the match. The maximum
+    offset is None if an unbounded repeat (e.g. ``\\s+``) precedes the strings.
+    Of all anchors, the one with the longest strings is chosen, then one without
+    letters and digits and then the one with the narrowest range of offsets.
+    Returns None if the regex has no anchor.
+    """
+    parsed = sre_parse.parse(regex)
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    anchors = _anchors(parsed.data, 0, 0)
+    if not anchors:
+        return None
+    return max(
+        anchors,
+        key=lambda anchor: (
+            min(len(s) for s in anchor[0]),
+            not any(s.isalnum() for s in anchor[0]),
+            -float("inf") if anchor[2] is None else anchor[1] - anchor[2],
+        ),
+    )
+
+
+def first_chars(regex: str) -> Optional[List[str]]:
+    """
+    Return the character class items (e.g. ``0-9`` or ``J``) of all characters a
+    match of the regex can start with or None if this cannot be determined.
+    """
+    parsed = sre_parse.parse(regex)
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    regex_first, nullable = _first_chars(parsed.data)
+    if regex_first is None or nullable:
+        return None
+    return sorted(regex_first)
+
+
+def first_char_class(regexes: List[str]) -> Optional[str]:
+    """
+    Return a character class matching every character a match of any of the
+    regexes can start with or None if this cannot be determined.
+    """
+    return _union_class([first_chars(regex) for regex in regexes])
+
+
+def _union_class(items: List[Optional[List[str]]]) -> Optional[str]:
+    first: Set[str] = set()
+    for regex_first in items:
+        if regex_first is None:
+            return None
+        first.update(regex_first)
+    return "[" + "".join(sorted(first)) + "]" if first else None
+
+
+# zero-width assertions of word boundaries, which do not tell a non-word
+# separator apart from the start or end of a text
+_BOUNDARIES = {
+    sre_parse.AT_BOUNDARY,
+    sre_parse.AT_NON_BOUNDARY,
+    sre_parse.AT_UNI_BOUNDARY,
+    sre_parse.AT_UNI_NON_BOUNDARY,
+    sre_parse.AT_LOC_BOUNDARY,
+    sre_parse.AT_LOC_NON_BOUNDARY,
+}
+
+
+def _matches_char(op: Any, av: Any, char: int) -> bool:
+    """
+    Return whether the parsed regex item can consume the character (code).
+    """
+    if op is sre_parse.LITERAL:
+        return av == char
+    if op is sre_parse.NOT_LITERAL:
+        return av != char
+    if op is sre_parse.IN:
+        negate = bool(av) and av[0][0] is sre_parse.NEGATE
+        member = False
+        for in_op, in_av in av[negate:]:
+            if in_op is sre_parse.LITERAL:
+                member = member or in_av == char
+            elif in_op is sre_parse.RANGE:
+                member = member or in_av[0] <= char <= in_av[1]
+            elif in_op is sre_parse.CATEGORY:
+                # a control character is only in the negated categories
+                member = member or "NOT" in str(in_av)
+            else:
+                member = True
+        return member != negate
+    # any character
+    return True
+
+
+def _sees_char(items: List, char: int, in_assertion: bool = False) -> bool:
+    for op, av in items:
+        if op is sre_parse.AT:
+            if av not in _BOUNDARIES:
+                return True
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            if _sees_char(av[1], char, True):
+                return True
+        elif op is sre_parse.SUBPATTERN:
+            if _sees_char(av[-1], char, in_assertion):
+                return True
+        elif op is sre_parse.BRANCH:
+            if any(_sees_char(branch, char, in_assertion) for branch in av[1]):
+                return True
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            if _sees_char(av[2], char, in_assertion):
+                return True
+        elif op is sre_parse.GROUPREF:
+            if in_assertion:
+                return True
+        elif in_assertion and _matches_char(op, av, char):
+            return True
+    return False
+
+
+def sees_separator(regex: str, separator: str) -> bool:
+    """
+    Return whether the matches of the regex in texts joined by the separator can
+    differ from those in the single texts, given that no match contains the
+    separator: whether a lookaround can consume the separator (e.g.
+    ``(?<!\\S)``) or an anchor other than a word boundary (e.g. ``^`` or ``$``)
+    tells it apart from the start or end of a text. Word boundaries do not, as
+    the separator is not a word character.
+    """
+    return _sees_char(sre_parse.parse(regex).data, ord(separator))
+
+
+# (date groups, max match length, first characters, literal anchor, whether the
+# separator of scan_texts is seen) of a rule, see _analyze
+RuleAnalysis = Tuple[
+    Tuple[int, int, int, int, int], int, Optional[List[str]], Optional[Anchor], bool
+]
+
+
+def _analyze(rule: Rule) -> RuleAnalysis:
+    """
+    Return the groups of the (day, month, month_str, year, short_year) components
+    (0 if absent), the maximum match length, the first characters, the literal
+    anchor of a rule and whether it sees the separator of scan_texts.
+    """
+    date_groups = rule.get_date_groups()
+    return (
+        (
+            date_groups.get("day", 0),
+            date_groups.get("month", 0),
+            date_groups.get("month_str", 0),
+            date_groups.get("year", 0),
+            date_groups.get("short_year", 0),
+        ),
+        max_match_len(rule.regex),
+        first_chars(rule.regex),
+        literal_anchor(rule.regex),
+        sees_separator(rule.regex, DateScanner.TEXT_SEPARATOR),
+    )
+
+
+class DateScanner:
+    """
+    Scans a text for all date rules in a single pass.
+
+    All rule regexes are merged into one alternation of named groups wrapped in a
+    lookahead, so a single ``finditer`` yields every position at which at least one
+    rule matches together with the first rule that fired there. Only the rules
+    from that one onwards are then evaluated at that position. The alternation is
+    guarded by a character class of all characters a rule can start with, so it
+    is skipped for most positions of regular text. The result is identical to
+    running ``finditer`` for each rule separately.
+
+    Alternatively, scan_anchored only evaluates each rule around the occurrences
+    of a literal every match of the rule contains, see literal_anchor.
+    """
+
+    # joins texts scanned in one pass. The texts are scanned separately if a rule
+    # matches the separator or a lookaround or anchor of a rule sees it (see
+    # sees_separator), so the matches are always those of the single texts
+    TEXT_SEPARATOR = "\x00"
+
+    def __init__(self, rules: List[Rule], month_idxs: Dict[str, int]) -> None:
+        self._build(
+            [(rule.regex, rule.pattern) for rule in rules],
+            month_idxs,
+            [_analyze(rule) for rule in rules],
+            [re.compile(rule.regex) for rule in rules],
+        )
+
+    def _build(
+        self,
+        rules: List[Tuple[str, str]],
+        month_idxs: Dict[str, int],
+        analyses: List["RuleAnalysis"],
+        regexes: List[re.Pattern],
+    ) -> None:
+        self.rules = rules
+        self.patterns = [pattern for _, pattern in rules]
+        self.month_idxs = month_idxs
+        self.analyses = analyses
+        # (day, month, month_str, year, short_year) group per rule, 0 if absent
+        self.date_groups = [analysis[0] for analysis in analyses]
+        self.max_match_len = max((analysis[1] for analysis in analyses), default=0)
+        # whether texts have to be scanned separately by scan_texts
+        self.sees_separator = any(analysis[4] for analysis in analyses)
+        self.regexes = regexes
+
+        # cheap check on the first character so the alternation is only tried at
+        # positions where at least one rule can start
+        gate = _union_class([analysis[2] for analysis in analyses])
+        self.combined_regex = re.compile(
+            (f"(?={gate})" if gate else "")
+            + "(?="
+            + "|".join(f"(?P<r{idx}>{regex})" for idx, (regex, _) in enumerate(rules))
+            + ")"
+        )
+        # map the group index of each named rule group to its rule index
+        self.group_to_rule = {
+            self.combined_regex.groupindex[f"r{idx}"]: idx for idx in range(len(rules))
+        }
+
+        # the strings of all anchors, longest first so the longest one matching at
+        # a position is found, mapped to the rules with an anchor matching there
+        self.anchors = [analysis[3] for analysis in analyses]
+        anchor_strs = sorted(
+            {s for anchor in self.anchors if anchor for s in anchor[0]},
+            key=lambda s: (-len(s), s),
+        )
+        self.anchor_rules = {
+            anchor_str: [
+                idx
+                for idx, anchor in enumerate(self.anchors)
+                if anchor and any(anchor_str.startswith(s) for s in anchor[0])
+            ]
+            for anchor_str in anchor_strs
+        }
+        self.anchor_regex = (
+            re.compile("|".join(re.escape(s) for s in anchor_strs))
+            if anchor_strs
+            else None
+        )
+        # the characters each rule can start with, any character if unknown
+        self.gates = [
+            re.compile(f"[{''.join(analysis[2])}]" if analysis[2] else "(?s).")
+            for analysis in analyses
+        ]
+
+    def update(self, rules: List[Rule], month_idxs: Dict[str, int]) -> "DateScanner":
+        """
+        Return a scanner for a changed rule set or month table. Only the rules this
+        scanner does not know yet are analyzed and compiled, the combined regex is
+        compiled again.
+        """
+        known = {rule: idx for idx, rule in enumerate(self.rules)}
+        analyses = []
+        regexes = []
+        for rule in rules:
+            idx = known.get((rule.regex, rule.pattern))
+            if idx is None:
+                analyses.append(_analyze(rule))
+                regexes.append(re.compile(rule.regex))
+            else:
+                analyses.append(self.analyses[idx])
+                regexes.append(self.regexes[idx])
+        scanner = DateScanner.__new__(DateScanner)
+        scanner._build(
+            [(rule.regex, rule.pattern) for rule in rules],
+            month_idxs,
+            analyses,
+            regexes,
+        )
+        return scanner
+
+    def to_table(self) -> Dict[str, Any]:
+        """
+        Return the rules and the results of analyzing them as plain data.
+        """
+        return {
+            "rules": [list(rule) for rule in self.rules],
+            "month_idxs": self.month_idxs,
+            "analyses": [list(analysis) for analysis in self.analyses],
+        }
+
+    @classmethod
+    def from_table(cls, table: Dict[str, Any]) -> "DateScanner":
+        """
+        Rebuild a scanner from the output of to_table without analyzing the rules
+        again, only the regexes are compiled.
+        """
+        scanner = cls.__new__(cls)
+        scanner._build(
+            [(regex, pattern) for regex, pattern in table["rules"]],
+            table["month_idxs"],
+            [
+                (
+                    tuple(date_groups),
+                    max_len,
+                    first,
+                    anchor if anchor is None else (anchor[0], anchor[1], anchor[2]),
+                    sees_sep,
+                )
+                for date_groups, max_len, first, anchor, sees_sep in table["analyses"]
+            ],
+            [re.compile(regex) for regex, _ in table["rules"]],
+        )
+        return scanner
+
+    def scan(
+        self,
+        text: str,
+        rule_times: Optional[List[float]] = None,
+        pos: int = 0,
+        rule_candidates: Optional[List[int]] = None,
+    ) -> List[Tuple[int, re.Match]]:
+        """
+        Return (rule index, match) pairs ordered by rule and then by position, as
+        if each rule regex was applied to the text with ``finditer`` from pos on.
+
+        If rule_times is given, the time spent per rule is added to it: the time of
+        matching the rule at the candidate positions plus the time of finding the
+        candidate positions at which it was the first rule to fire. The number of
+        candidate positions each rule was tried at is added to rule_candidates.
+        """
+        n_rules = len(self.regexes)
+        if not n_rules:
+            return []
+        if rule_times is not None:
+            return self._scan_profiled(
+                text,
+                rule_times,
+                pos,
+                rule_candidates if rule_candidates is not None else [0] * n_rules,
+            )
+        matches: List[List[re.Match]] = [[] for _ in range(n_rules)]
+        # end of the last match per rule as finditer only yields non-overlapping matches
+        last_ends = [0] * n_rules
+
+        for candidate in self.combined_regex.finditer(text, pos):
+            pos = candidate.start()
+            for rule_idx in range(self.group_to_rule[candidate.lastindex], n_rules):
+                if pos < last_ends[rule_idx]:
+                    continue
+                m = self.regexes[rule_idx].match(text, pos)
+                if m:
+                    matches[rule_idx].append(m)
+                    last_ends[rule_idx] = m.end()
+
+        return [
+            (rule_idx, m)
+            for rule_idx, rule_matches in enumerate(matches)
+            for m in rule_matches
+        ]
+
+    def _scan_profiled(
+        self, text: str, rule_times: List[float], pos: int, rule_candidates: List[int]
+    ) -> List[Tuple[int, re.Match]]:
+        n_rules = len(self.regexes)
+        matches: List[List[re.Match]] = [[] for _ in range(n_rules)]
+        last_ends = [0] * n_rules
+
+        t = perf_counter()
+        for candidate in self.combined_regex.finditer(text, pos):
+            pos = candidate.start()
+            first_rule_idx = self.group_to_rule[candidate.lastindex]
+            rule_times[first_rule_idx] += perf_counter() - t
+            for rule_idx in range(first_rule_idx, n_rules):
+                if pos < last_ends[rule_idx]:
+                    continue
+                t = perf_counter()
+                m = self.regexes[rule_idx].match(text, pos)
+                rule_times[rule_idx] += perf_counter() - t
+                rule_candidates[rule_idx] += 1
+                if m:
+                    matches[rule_idx].append(m)
+                    last_ends[rule_idx] = m.end()
+            t = perf_counter()
+
+        return [
+            (rule_idx, m)
+            for rule_idx, rule_matches in enumerate(matches)
+            for m in rule_matches
+        ]
+
+    def scan_anchored(
+        self,
+        text: str,
+        rule_times: Optional[List[float]] = None,
+        pos: int = 0,
+        rule_candidates: Optional[List[int]] = None,
+    ) -> List[Tuple[int, re.Match]]:
+        """
+        Return (rule index, match) pairs like scan, but only evaluate the rules
+        around the hits of their literal anchors (see literal_anchor).
+
+        The hits of all anchors are found in a single pass. A match containing a
+        hit starts within the range of offsets of the anchor before it (up to the
+        hit if an unbounded repeat precedes the anchor), so each rule is only
+        tried at the positions of these ranges it can start with. Rules without an
+        anchor run over the whole text. The result is identical to running
+        ``finditer`` for each rule.
+
+        If given, the time spent per rule is added to rule_times (the anchor pass
+        is only part of the total time) and the number of positions each rule was
+        tried at to rule_candidates.
+        """
+        n_rules = len(self.regexes)
+        # ranges of the positions each rule can start at
+        starts: List[List[Tuple[int, int]]] = [[] for _ in range(n_rules)]
+        if self.anchor_regex is not None:
+            search = self.anchor_regex.search
+            anchor_rules = self.anchor_rules
+            anchors = self.anchors
+            # unlike finditer, also find hits starting inside the previous hit
+            hit = search(text, pos)
+            while hit is not None:
+                hit_pos = hit.start()
+                for rule_idx in anchor_rules[hit.group()]:
+                    _, min_offset, max_offset = anchors[rule_idx]  # type: ignore
+                    starts[rule_idx].append(
+                        (
+                            pos if max_offset is None else hit_pos - max_offset,
+                            hit_pos - min_offset,
+                        )
+                    )
+                hit = search(text, hit_pos + 1)
+
+        matches = []
+        for rule_idx, regex in enumerate(self.regexes):
+            if rule_times is not None:
+                t = perf_counter()
+            n_candidates = 0
+            if self.anchors[rule_idx] is None:
+                n_candidates = len(text) - pos
+                matches.extend((rule_idx, m) for m in regex.finditer(text, pos))
+            else:
+                gate = self.gates[rule_idx]
+                # matches must not overlap, positions up to tried were tried already
+                next_pos = pos
+                tried = -1
+                for first, last in starts[rule_idx]:
+                    first = max(first, next_pos, tried + 1)
+                    if first > last:
+                        continue
+                    tried = last
+                    for candidate in gate.finditer(text, first, last + 1):
+                        candidate_pos = candidate.start()
+                        if candidate_pos < next_pos:
+                            continue
+                        n_candidates += 1
+                        m = regex.match(text, candidate_pos)
+                        if m is not None:
+                            matches.append((rule_idx, m))
+                            next_pos = m.end()
+            if rule_times is not None:
+                rule_times[rule_idx] += perf_counter() - t
+            if rule_candidates is not None:
+                rule_candidates[rule_idx] += n_candidates
+        return matches
+
+    def scan_texts(
+        self,
+        texts: List[str],
+        method: str = "anchored",
+        rule_times: Optional[List[float]] = None,
+        rule_candidates: Optional[List[int]] = None,
+    ) -> List[List[Tuple[int, int, int, re.Match]]]:
+        """
+        Scan the texts joined by TEXT_SEPARATOR for dates in a single pass with
+        scan_anchored, scan ("combined") or scan_per_rule and split the matches
+        back per text. Returns (rule index, start, end, match) tuples with
+        character offsets relative to the respective text. The time spent and the
+        positions tried per rule are added to rule_times and rule_candidates if
+        given. If a rule sees the separator, the texts are scanned separately.
+        """
+        if len(texts) > 1 and self.sees_separator:
+            return [
+                self.scan_texts([t], method, rule_times, rule_candidates)[0]
+                for t in texts
+            ]
+        text = self.TEXT_SEPARATOR.join(texts)
+        if method == "anchored":
+            matches = self.scan_anchored(text, rule_times, 0, rule_candidates)
+        elif method == "per_rule":
+            matches = self.scan_per_rule(text, rule_times, 0, rule_candidates)
+        else:
+            matches = self.scan(text, rule_times, 0, rule_candidates)
+
+        text_starts = [0]
+        for t in texts[:-1]:
+            text_starts.append(text_starts[-1] + len(t) + len(self.TEXT_SEPARATOR))
+        text_matches: List[List[Tuple[int, int, int, re.Match]]] = [[] for _ in texts]
+        for rule_idx, m in matches:
+            start, end = m.span()
+            text_idx = bisect_right(text_starts, start) - 1
+            start -= text_starts[text_idx]
+            end -= text_starts[text_idx]
+            if end > len(texts[text_idx]):
+                # a rule matched across the separator, scan the texts separately
+                return [
+                    self.scan_texts([t], method, rule_times, rule_candidates)[0]
+                    for t in texts
+                ]
+            text_matches[text_idx].append((rule_idx, start, end, m))
+        return text_matches
+
+    def to_date(self, rule_idx: int, m: re.Match) -> Optional[dt.datetime]:
+        """
+        Build the date of a match of the given rule directly from its groups.
+        Values are validated like strptime would validate them for the rule's
+        pattern and None is returned for matches strptime would reject.
+        """
+        day_group, month_group, month_str_group, year_group, short_year_group = (
+            self.date_groups[rule_idx]
+        )
+
+        day = 1
+        if day_group:
+            day_str = m.group(day_group)
+            if not _DAY_RE.fullmatch(day_str):
+                return None
+            day = int(day_str)
+
+        month = 1
+        if month_group:
+            month_str = m.group(month_group)
+            if not _MONTH_RE.fullmatch(month_str):
+                return None
+            month = int(month_str)
+        elif month_str_group:
+            month = self.month_idxs.get(m.group(month_str_group).casefold(), 0)
+            if not month:
+                return None
+
+        year = 1900
+        if year_group:
+            year_str = m.group(year_group)
+            if not _YEAR_RE.fullmatch(year_str):
+                return None
+            year = int(year_str)
+        elif short_year_group:
+            year_str = m.group(short_year_group)
+            if not _SHORT_YEAR_RE.fullmatch(year_str):
+                return None
+            year = int(year_str)
+            year += 2000 if year < SHORT_YEAR_PIVOT else 1900
+
+        if day > _DAYS_IN_MONTH[month] and not (
+            month == 2 and day == 29 and calendar.isleap(year)
+        ):
+            return None
+        try:
+            return dt.datetime(year, month, day)
+        except ValueError:
+            return None
+
+    def scan_per_rule(
+        self,
+        text: str,
+        rule_times: Optional[List[float]] = None,
+        pos: int = 0,
+        rule_candidates: Optional[List[int]] = None,
+    ) -> List[Tuple[int, re.Match]]:
+        """
+        Reference implementation running one ``finditer`` per rule over the text,
+        so every rule is tried at every position.
+        """
+        if rule_candidates is not None:
+            for rule_idx in range(len(self.regexes)):
+                rule_candidates[rule_idx] += len(text) - pos
+        if rule_times is None:
+            return [
+                (rule_idx, m)
+                for rule_idx, regex in enumerate(self.regexes)
+                for m in regex.finditer(text, pos)
+            ]
+        matches = []
+        for rule_idx, regex in enumerate(self.regexes):
+            t = perf_counter()
+            matches.extend((rule_idx, m) for m in regex.finditer(text, pos))
+            rule_times[rule_idx] += perf_counter() - t
+        return matches
+
+
+class DurationScanner:
+    """
+    Regex counterpart of the duration token scan of Timexy for raw text: a
+    number (digits or a number word) followed by a single space and a unit.
+    Digits require the unit in its exact spelling, number words and units following
+    them are matched case-insensitively.
+    """
+
+    def __init__(self, units: Dict[str, List[str]], num_words: List[str]) -> None:
+        unit_keys: Dict[str, str] = {}
+        unit_keys_lower: Dict[str, str] = {}
+        for key, vals in units.items():
+            for val in vals:
+                unit_keys.setdefault(val, key)
+                unit_keys_lower.setdefault(val.lower(), key)
+        num_word_idxs: Dict[str, int] = {}
+        for idx, num_word in enumerate(num_words):
+            num_word_idxs.setdefault(num_word.lower(), idx)
+        self._build(unit_keys, unit_keys_lower, num_word_idxs)
+        self.max_match_len = max(
+            max_match_len(self.digit_regex.pattern),
+            max_match_len(self.word_regex.pattern),
+        )
+
+    def _build(
+        self,
+        unit_keys: Dict[str, str],
+        unit_keys_lower: Dict[str, str],
+        num_word_idxs: Dict[str, int],
+    ) -> None:
+        self.unit_keys = unit_keys
+        self.unit_keys_lower = unit_keys_lower
+        self.num_word_idxs = num_word_idxs
+        units_re = _alternation(self.unit_keys)
+        num_words_re = _alternation(self.num_word_idxs)
+        self.digit_regex = re.compile(f"(?<!\\w)(\\d+) ({units_re})(?!\\w)")
+        self.word_regex = re.compile(
+            f"(?<!\\w)({num_words_re}) ({units_re})(?!\\w)", re.IGNORECASE
+        )
+
+    def to_table(self) -> Dict[str, Any]:
+        """
+        Return the duration vocabulary as plain data.
+        """
+        return {
+            "unit_keys": self.unit_keys,
+            "unit_keys_lower": self.unit_keys_lower,
+            "num_word_idxs": self.num_word_idxs,
+            "max_match_len": self.max_match_len,
+        }
+
+    @classmethod
+    def from_table(cls, table: Dict[str, Any]) -> "DurationScanner":
+        """
+        Rebuild a scanner from the output of to_table.
+        """
+        scanner = cls.__new__(cls)
+        scanner._build(
+            table["unit_keys"], table["unit_keys_lower"], table["num_word_idxs"]
+        )
+        scanner.max_match_len = table["max_match_len"]
+        return scanner
+
+    def scan(
+        self, text: str, pos: int = 0
+    ) -> List[Tuple[int, int, Union[int, str], str]]:
+        """
+        Return (start, end, count, unit) tuples of all durations from pos on ordered
+        by position. Durations with a count of zero (number word) are skipped like
+        in Timexy.
+        """
+        durations = []
+        for m in self.digit_regex.finditer(text, pos):
+            durations.append((*m.span(), m.group(1), self.unit_keys[m.group(2)]))
+        for m in self.word_regex.finditer(text, pos):
+            cnt = self.num_word_idxs[m.group(1).lower()]
+            unit = self.unit_keys_lower.get(m.group(2).lower())
+            if cnt and unit:
+                durations.append((*m.span(), cnt, unit))
+        return sorted(durations)
+
+
+def _alternation(strs: Iterable[str]) -> str:
+    return "|".join(re.escape(s) for s in sorted(strs, key=len, reverse=True))
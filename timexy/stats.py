@@ -0,0 +1,129 @@
+from typing import Any, Dict, List, Optional
+
+
+class RuleStats:
+    """
+    Counters of a single date rule or of all duration patterns.
+
+    scan_time: seconds spent scanning the texts for the rule
+    candidates: text positions at which the rule regex was tried (every position
+        with the per_rule scanner)
+    hits: matches of the rule
+    parse_failures: matches that are not a valid date
+    dropped: spans discarded during the overlap resolution
+    """
+
+    __slots__ = (
+        "pattern",
+        "scan_time",
+        "candidates",
+        "hits",
+        "parse_failures",
+        "dropped",
+    )
+
+    def __init__(self, pattern: str) -> None:
+        self.pattern = pattern
+        self.reset()
+
+    def reset(self) -> None:
+        self.scan_time = 0.0
+        self.candidates = 0
+        self.hits = 0
+        self.parse_failures = 0
+        self.dropped = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class TimexyStats:
+    """
+    Statistics of a Timexy component. The numbers of processed and skipped docs
+    are always counted, everything else only if the component is profiled.
+
+    n_docs: processed docs
+    n_docs_skipped: docs skipped by the prefilter
+    scan_time: seconds spent scanning the texts for dates (all rules)
+    matcher_time: seconds spent matching the durations in the tokens
+    commit_time: seconds spent resolving overlaps and setting the entities
+    rules: counters per date rule, in the order of the rules
+    durations: counters of the duration patterns (without scan and parse numbers)
+    """
+
+    def __init__(self, patterns: List[str]) -> None:
+        self.rules = [RuleStats(pattern) for pattern in patterns]
+        self.durations = RuleStats("duration")
+        self.reset()
+
+    def reset(self) -> None:
+        self.n_docs = 0
+        self.n_docs_skipped = 0
+        self.scan_time = 0.0
+        self.matcher_time = 0.0
+        self.commit_time = 0.0
+        for rule_stats in self.rules:
+            rule_stats.reset()
+        self.durations.reset()
+
+    def with_rules(
+        self, patterns: List[str], rule_idxs: List[Optional[int]]
+    ) -> "TimexyStats":
+        """
+        Return the statistics for a changed rule set, given the index of each rule
+        in the previous rules or None for new rules. The counters of the docs, the
+        durations and the rules kept are carried over.
+        """
+        stats = TimexyStats(patterns)
+        for name in (
+            "n_docs",
+            "n_docs_skipped",
+            "scan_time",
+            "matcher_time",
+            "commit_time",
+        ):
+            setattr(stats, name, getattr(self, name))
+        stats.durations = self.durations
+        for idx, rule_idx in enumerate(rule_idxs):
+            if rule_idx is not None:
+                stats.rules[idx] = self.rules[rule_idx]
+        return stats
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "n_docs": self.n_docs,
+            "n_docs_skipped": self.n_docs_skipped,
+            "scan_time": self.scan_time,
+            "matcher_time": self.matcher_time,
+            "commit_time": self.commit_time,
+            "rules": [rule_stats.to_dict() for rule_stats in self.rules],
+            "durations": self.durations.to_dict(),
+        }
+
+    def summary(self) -> str:
+        """
+        Return a table of the rule counters, slowest rules first.
+        """
+        lines = [
+            f"docs: {self.n_docs} ({self.n_docs_skipped} skipped), "
+            f"scan: {self.scan_time * 1000:.1f} ms, "
+            f"matcher: {self.matcher_time * 1000:.1f} ms, "
+            f"commit: {self.commit_time * 1000:.1f} ms",
+            f"{'rule':<4} {'pattern':<12} {'scan ms':>9} {'candidates':>10} "
+            f"{'hits':>7} {'failures':>8} {'dropped':>7}",
+        ]
+        rules = sorted(
+            enumerate(self.rules), key=lambda r: r[1].scan_time, reverse=True
+        )
+        for rule_idx, rule_stats in rules:
+            lines.append(
+                f"{rule_idx:<4} {rule_stats.pattern:<12} "
+                f"{rule_stats.scan_time * 1000:9.2f} {rule_stats.candidates:10} "
+                f"{rule_stats.hits:7} {rule_stats.parse_failures:8} "
+                f"{rule_stats.dropped:7}"
+            )
+        lines.append(
+            f"{'':<4} {'duration':<12} {'':>9} {'':>10} {self.durations.hits:7} "
+            f"{'':>8} {self.durations.dropped:7}"
+        )
+        return "\n".join(lines)
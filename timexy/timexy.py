@@ -1,18 +1,102 @@
 import datetime as dt
 import logging
 import re
-import traceback
+import threading
+import time
+from bisect import bisect_left, bisect_right
 from collections import OrderedDict
-from importlib import import_module
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Tuple, Union
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
+import numpy as np
 import srsly
+from spacy.attrs import ENT_TYPE, IDX, IS_DIGIT, LENGTH, LOWER, ORTH
 from spacy.language import Language
-from spacy.matcher import Matcher
+from spacy.strings import hash_string
 from spacy.tokens import Doc, Span
+from spacy.util import minibatch
+
+from . import records, registry, util
+from .language import Language as TimexyLanguage
+from .language import is_supported, load_language
+from .rule import Rule
+from .scanner import DateScanner
+from .stats import TimexyStats
+
+# rows of the array returned by Timexy.epochs
+EPOCH_DTYPE = np.dtype(
+    [
+        ("doc", np.int64),
+        ("start_char", np.int64),
+        ("end_char", np.int64),
+        ("epoch", np.float64),
+    ]
+)
+_DATE_KB_ID_PREFIX = 'TIMEX3 type="DATE" value="'
+
+# a match to be added as entity: (start token, end token, kb_id, source, value,
+# unit) where source is the index of the date rule or -1 for durations and value
+# the date ordinal or the duration count (unit is empty for dates)
+Candidate = Tuple[int, int, str, int, int, str]
 
-from . import util
+# marks cache misses, None is a cached parsing failure
+_MISSING = object()
+
+
+class Rules(NamedTuple):
+    """
+    The compiled rules of a Timexy component with the lookup tables of the
+    duration token scan and the statistics of the rules. Replaced as a whole when
+    the rules change, so a call of the component uses a consistent set.
+    """
+
+    compiled: registry.CompiledLanguage
+    stats: TimexyStats
+    # string hashes of the units (exact spelling after digits, lowercase after
+    # number words) to their unit key and of the number words to their count
+    unit_orths: Dict[int, str]
+    unit_lowers: Dict[int, str]
+    num_word_lowers: Dict[int, int]
+    # the hashes of the units and number words to preselect candidate tokens
+    unit_lower_hashes: np.ndarray
+    num_word_hashes: np.ndarray
+
+    @classmethod
+    def create(
+        cls, compiled: registry.CompiledLanguage, stats: Optional[TimexyStats] = None
+    ) -> "Rules":
+        duration_scanner = compiled.duration_scanner
+        unit_lowers = {
+            hash_string(s): key for s, key in duration_scanner.unit_keys_lower.items()
+        }
+        num_word_lowers = {
+            hash_string(s): idx for s, idx in duration_scanner.num_word_idxs.items()
+        }
+        return cls(
+            compiled,
+            stats or TimexyStats(compiled.date_scanner.patterns),
+            {hash_string(s): key for s, key in duration_scanner.unit_keys.items()},
+            unit_lowers,
+            num_word_lowers,
+            np.array(list(unit_lowers), dtype=np.uint64),
+            np.array(list(num_word_lowers), dtype=np.uint64),
+        )
+
+
+def _set_extension() -> None:
+    # records of the dates and durations added by Timexy (if structured)
+    if not Doc.has_extension("timexy"):
+        Doc.set_extension("timexy", default=None)
 
 
 def _load_cfg(path: Any) -> Dict:
@@ -24,20 +108,47 @@ def _load_cfg(path: Any) -> Dict:
 
 @Language.factory(
     "timexy",
-    default_config={"label": "timexy", "kb_id_type": "timex3", "overwrite": False},
+    default_config={
+        "label": "timexy",
+        "kb_id_type": "timex3",
+        "overwrite": False,
+        "scanner": "anchored",
+        "prefilter": True,
+        "profile": False,
+        "cache_size": 1024,
+        "timezone": "UTC",
+        "structured": False,
+    },
 )
 def make_timexy(
-    nlp: Language, name: str, kb_id_type: str, label: str, overwrite: bool
+    nlp: Language,
+    name: str,
+    kb_id_type: str,
+    label: str,
+    overwrite: bool,
+    scanner: str,
+    prefilter: bool,
+    profile: bool,
+    cache_size: int,
+    timezone: str,
+    structured: bool,
 ) -> "Timexy":
     return Timexy(
-        nlp=nlp, name=name, kb_id_type=kb_id_type, label=label, overwrite=overwrite
+        nlp=nlp,
+        name=name,
+        kb_id_type=kb_id_type,
+        label=label,
+        overwrite=overwrite,
+        scanner=scanner,
+        prefilter=prefilter,
+        profile=profile,
+        cache_size=cache_size,
+        timezone=timezone,
+        structured=structured,
     )
 
 
 class Timexy:
-
-    MAX_LEN_PATTERN = 5
-
     def __init__(
         self,
         nlp: Language,
@@ -45,199 +156,875 @@ class Timexy:
         kb_id_type: str = "timex3",
         label: str = "timexy",
         overwrite: bool = False,
+        scanner: str = "anchored",
+        prefilter: bool = True,
+        profile: bool = False,
+        cache_size: int = 1024,
+        timezone: str = "UTC",
+        structured: bool = False,
     ) -> None:
         self.logger = logging.getLogger(__name__)
 
         self.lang = nlp.lang
         self.name = name
-        self.kb_id_type = kb_id_type
-        self.label = label
-        self.overwrite = overwrite
-        self.cfg = {
-            "label": self.label,
-            "kb_id_type": self.kb_id_type,
-            "overwrite": self.overwrite,
-        }
-
-        try:
-            self.timexy_lang = getattr(
-                import_module(f"timexy.languages.{self.lang}"), self.lang
-            )
-        except Exception:
+        self._apply_cfg(
+            {
+                "label": label,
+                "kb_id_type": kb_id_type,
+                "overwrite": overwrite,
+                "scanner": scanner,
+                "prefilter": prefilter,
+                "profile": profile,
+                "cache_size": cache_size,
+                "timezone": timezone,
+                "structured": structured,
+            }
+        )
+        if not is_supported(self.lang):
             raise NameError(f"Language {self.lang} not supported by timexy")
+        # the rules are loaded on first use (see __getattr__), so a component
+        # loaded from disk only uses its serialized rules
+        self._rule_table: Optional[Dict[str, Any]] = None
+        # serializes changes and the lazy load of the rules, reentrant as changes
+        # load the rules first
+        self._rules_lock = threading.RLock()
+
+    def _apply_cfg(self, cfg: Dict[str, Any]) -> None:
+        """
+        Validate the configuration and set up the component accordingly.
+        """
+        if cfg["scanner"] not in ("anchored", "combined", "per_rule"):
+            raise ValueError(f"Illegal argument for scanner: {cfg['scanner']}")
+        if cfg["cache_size"] < 0:
+            raise ValueError(f"Illegal argument for cache_size: {cfg['cache_size']}")
+        # timezone of the timestamps, None for the local timezone of the process
+        self.tz = util.get_timezone(cfg["timezone"])
 
-        self.date_regexes = []
-        for date_rule in self.timexy_lang.rules:
-            self.date_regexes.append((re.compile(date_rule.regex), date_rule.pattern))
+        self.cfg = cfg
+        self.label = cfg["label"]
+        self.kb_id_type = cfg["kb_id_type"]
+        self.overwrite = cfg["overwrite"]
+        self.scanner = cfg["scanner"]
+        self.prefilter = cfg["prefilter"]
+        self.profile = cfg["profile"]
+        self.cache_size = cfg["cache_size"]
+        self.timezone = cfg["timezone"]
+        self.structured = cfg["structured"]
+        # kb_ids (None if not a valid date) of the recently normalized matches
+        self.kb_id_cache = util.LRUCache(self.cache_size) if self.cache_size else None
+        _set_extension()
 
-        self.matcher = Matcher(nlp.vocab)
-        for key, vals in self.timexy_lang.units.items():
-            for val in vals:
-                self.matcher.add(
-                    key,
-                    [[{"IS_DIGIT": True}, {"TEXT": val}]],
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes not set yet
+        if name != "_rules":
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        self._load_rules()
+        return self.__dict__[name]
+
+    def _load_rules(self) -> None:
+        with self._rules_lock:
+            # another thread may have loaded the rules in the meantime
+            if "_rules" in self.__dict__:
+                return
+            rule_table = self.__dict__.pop("_rule_table", None)
+            if rule_table is None:
+                compiled = registry.get_compiled(load_language(self.lang))
+            else:
+                # rebuilt from the analyzed rules, only the regexes are compiled
+                compiled = registry.get_compiled(
+                    TimexyLanguage.from_table(rule_table["language"]), rule_table
                 )
+            self._rules = Rules.create(compiled)
+
+    @property
+    def compiled(self) -> registry.CompiledLanguage:
+        return self._rules.compiled
+
+    @property
+    def timexy_lang(self) -> TimexyLanguage:
+        return self._rules.compiled.timexy_lang
+
+    @property
+    def date_scanner(self) -> DateScanner:
+        return self._rules.compiled.date_scanner
+
+    @property
+    def stats(self) -> TimexyStats:
+        return self._rules.stats
+
+    @property
+    def cue_regex(self) -> Optional[re.Pattern]:
+        return self.compiled.cue_regex if self.prefilter else None
+
+    def add_rules(self, rules: Iterable[Rule]) -> None:
+        """
+        Add date rules to the component. Every rule is validated against its tests
+        first: the rule alone has to match each test text at the given character
+        offsets with a valid date. Raises a ValueError if a rule fails.
+        """
+        rules = list(rules)
+        with self._rules_lock:
+            timexy_lang = self.timexy_lang
+            for rule in rules:
+                self._check_rule(rule, timexy_lang.month_idxs)
+            self._swap_rules(timexy_lang.replace(rules=timexy_lang.rules + rules))
+
+    def remove_rule(self, regex: str) -> None:
+        """
+        Remove the date rules with the given regex from the component. Raises a
+        ValueError if there is no such rule.
+        """
+        with self._rules_lock:
+            timexy_lang = self.timexy_lang
+            rules = [rule for rule in timexy_lang.rules if rule.regex != regex]
+            if len(rules) == len(timexy_lang.rules):
+                raise ValueError(f"No rule with regex {regex}")
+            self._swap_rules(timexy_lang.replace(rules=rules))
+
+    def add_month_aliases(self, month: int, aliases: Iterable[str]) -> None:
+        """
+        Add strings of the month (1 to 12) to the month table, e.g. "Sept". They
+        are normalized by all rules and matched by rules added afterwards that are
+        built with timexy_lang.get_month_re(). Raises a ValueError if an alias
+        already belongs to another month.
+        """
+        if not 1 <= month <= 12:
+            raise ValueError(f"Illegal argument for month: {month}")
+        with self._rules_lock:
+            timexy_lang = self.timexy_lang
+            aliases = [
+                alias
+                for alias in aliases
+                if timexy_lang.month_idxs.get(alias.casefold()) != month
+            ]
+            for alias in aliases:
+                if alias.casefold() in timexy_lang.month_idxs:
+                    raise ValueError(f"{alias} is already a string of another month")
+            months = [list(month_strs) for month_strs in timexy_lang.months]
+            months[month - 1].extend(aliases)
+            self._swap_rules(timexy_lang.replace(months=months))
 
-                self.matcher.add(
-                    key,
-                    [
-                        [
-                            {"LOWER": {"IN": self.timexy_lang.num_words}},
-                            {"LOWER": val.lower()},
-                        ]
-                    ],
+    def _check_rule(self, rule: Rule, month_idxs: Dict[str, int]) -> None:
+        if not rule.tests:
+            raise ValueError(f"Rule {rule.regex} has no tests")
+        scanner = DateScanner([rule], month_idxs)
+        for text, start, end in rule.tests:
+            if not any(
+                m.span() == (start, end) and scanner.to_date(0, m) is not None
+                for _, m in scanner.scan(text)
+            ):
+                raise ValueError(
+                    f"Rule {rule.regex} does not match a valid date at {(start, end)} "
+                    f"in test {text!r}"
                 )
 
+    def _swap_rules(self, timexy_lang: TimexyLanguage) -> None:
+        """
+        Compile the changed rules incrementally and replace the rules of the
+        component at once. Calls in progress finish with the previous rules.
+        """
+        rules = self._rules
+        compiled = registry.get_compiled(timexy_lang, previous=rules.compiled)
+        rule_idxs = {
+            rule: idx for idx, rule in enumerate(rules.compiled.date_scanner.rules)
+        }
+        stats = rules.stats.with_rules(
+            compiled.date_scanner.patterns,
+            [rule_idxs.get(rule) for rule in compiled.date_scanner.rules],
+        )
+        self._rules = Rules.create(compiled, stats)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Only ship plain data, the precompiled rule table (see
+        # CompiledLanguage.to_table) is rebuilt lazily on first use after
+        # unpickling (e.g. in nlp.pipe workers) without analyzing the rules again
+        return {
+            "lang": self.lang,
+            "name": self.name,
+            "cfg": self.cfg,
+            "rule_table": self.compiled.to_table(),
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.lang = state["lang"]
+        self.name = state["name"]
+        self._apply_cfg(state["cfg"])
+        self._rule_table = state["rule_table"]
+        self._rules_lock = threading.RLock()
+
     def __call__(self, doc: Doc) -> Doc:
-        spans_to_add = self._date_matches(doc) + self._duration_matches(doc)
+        rules = self._rules
+        text = doc.text
+        if not self._has_cues(text, rules):
+            return doc
+        return self._annotate(doc, self._scan_texts([text], rules)[0], rules)
 
-        # Create entities for all gathered spans
-        for span in spans_to_add:
+    def _has_cues(self, text: str, rules: Rules) -> bool:
+        """
+        Return whether the text can contain a date or duration at all and count
+        the docs skipped otherwise.
+        """
+        rules.stats.n_docs += 1
+        cue_regex = rules.compiled.cue_regex
+        if not self.prefilter or cue_regex is None or cue_regex.search(text):
+            return True
+        rules.stats.n_docs_skipped += 1
+        return False
+
+    def _scan_texts(
+        self, texts: List[str], rules: Rules
+    ) -> List[List[Tuple[int, int, int, re.Match]]]:
+        date_scanner = rules.compiled.date_scanner
+        if not self.profile:
+            return date_scanner.scan_texts(texts, self.scanner)
+
+        stats = rules.stats
+        rule_times = [0.0] * len(stats.rules)
+        rule_candidates = [0] * len(stats.rules)
+        scan_start = time.perf_counter()
+        text_matches = date_scanner.scan_texts(
+            texts, self.scanner, rule_times, rule_candidates
+        )
+        stats.scan_time += time.perf_counter() - scan_start
+        for rule_stats, rule_time, n_candidates in zip(
+            stats.rules, rule_times, rule_candidates
+        ):
+            rule_stats.scan_time += rule_time
+            rule_stats.candidates += n_candidates
+        return text_matches
+
+    def pipe(self, stream: Iterable[Doc], batch_size: int = 128) -> Iterator[Doc]:
+        """
+        Process a stream of docs in batches. The texts of all docs in a batch are
+        scanned for dates at once.
+        """
+        for docs in minibatch(stream, size=batch_size):
+            rules = self._rules
+            texts = [doc.text for doc in docs]
+            has_cues = [self._has_cues(text, rules) for text in texts]
+            date_matches = iter(
+                self._scan_texts([text for text, c in zip(texts, has_cues) if c], rules)
+            )
+            for doc, c in zip(docs, has_cues):
+                yield self._annotate(doc, next(date_matches), rules) if c else doc
+
+    def reannotate(
+        self,
+        doc: Doc,
+        previous: Union[Doc, Iterable[Tuple[int, int, str]]],
+        edits: Iterable[Tuple[int, int, str]],
+    ) -> Doc:
+        """
+        Annotate the doc of an edited text incrementally, e.g. in an editor.
+        previous is the annotated doc of the text before the edits or the entities
+        of this component in it as (start_char, end_char, kb_id) tuples, edits are
+        non-overlapping (start_char, end_char, replacement) tuples in offsets of
+        the previous text.
 
-            # ignore match if there is an overlapping entity of another type
-            if (
-                any(
-                    t.ent_type and t.ent_type_ != self.label
-                    for t in doc[span.start : span.end]
+        Only windows around the edits, widened by the longest possible match, are
+        scanned again. The entities of this component outside of the windows are
+        kept with shifted offsets, so the time taken grows with the size of the
+        edits and not with the size of the text. The other entities of the doc
+        are kept as well. Structured records of the kept entities are taken from
+        the previous doc or decoded from the kb_ids (see records.decode_timex3).
+        """
+        rules = self._rules
+        edits = sorted((start, end, len(text)) for start, end, text in edits)
+        n_chars = _text_len(doc)
+        if isinstance(previous, Doc):
+            delta = sum(n_new - (end - start) for start, end, n_new in edits)
+            if _text_len(previous) + delta != n_chars:
+                raise ValueError(
+                    "Illegal argument for edits: they do not turn the text of the "
+                    "previous doc into the text of the doc"
                 )
-                and not self.overwrite
+        if not n_chars:
+            return doc
+
+        # the edited ranges in offsets of the doc, widened by the longest match
+        width = max(
+            rules.compiled.date_scanner.max_match_len,
+            rules.compiled.duration_scanner.max_match_len,
+        )
+        edit_ends = []
+        shifts = [0]
+        windows = []
+        for start, end, n_new in edits:
+            if start > end or (edit_ends and start < edit_ends[-1]):
+                raise ValueError(f"Illegal argument for edits: {(start, end)}")
+            new_start = start + shifts[-1]
+            windows.append((new_start - width, new_start + n_new + width))
+            edit_ends.append(end)
+            shifts.append(shifts[-1] + n_new - (end - start))
+        windows = _merge_ranges(windows)
+        window_starts = [start for start, _ in windows]
+
+        # the entities of other components set on the doc, e.g. by a NER
+        foreign = [
+            (e.start_char, e.end_char) for e in doc.ents if e.label_ != self.label
+        ]
+        foreign_starts = [start for start, _ in foreign]
+
+        # shift the previous entities, those overlapping a window or an entity of
+        # another component are found again (and resolved as in a full pass)
+        kept = []
+        dropped = []
+        for start, end, kb_id, row in self._previous_entities(previous):
+            start += shifts[bisect_right(edit_ends, start)]
+            end += shifts[bisect_right(edit_ends, end)]
+            idx = bisect_left(window_starts, end) - 1
+            foreign_idx = bisect_left(foreign_starts, end) - 1
+            if (idx >= 0 and windows[idx][1] > start) or (
+                foreign_idx >= 0 and foreign[foreign_idx][1] > start
+            ):
+                dropped.append((start, end))
+            else:
+                kept.append((start, end, kb_id, row))
+
+        # the token ranges scanned again, with the dropped entities covered
+        offsets = _token_offsets(doc)
+        token_windows = []
+        for start, end in _merge_ranges(windows + dropped):
+            token_start, token_end = _expand(offsets, max(start, 0), min(end, n_chars))
+            if token_start < token_end:
+                token_windows.append((token_start, token_end))
+        token_windows = _merge_ranges(token_windows)
+
+        # scan the windows with enough context for the lookarounds of the rules
+        texts = []
+        for start, end in token_windows:
+            start_char = int(offsets[0][start])
+            end_char = int(offsets[1][end - 1])
+            context_start, context_end = _expand(
+                offsets, max(start_char - width, 0), min(end_char + width, n_chars)
+            )
+            context = doc[context_start:context_end]
+            texts.append((context.text, context.start_char, start_char, end_char))
+        ents_to_add = []
+        if self._has_cues("".join(text for text, _, _, _ in texts), rules):
+            date_matches = []
+            for (_, offset, start_char, end_char), text_matches in zip(
+                texts, self._scan_texts([text for text, _, _, _ in texts], rules)
             ):
+                date_matches.extend(
+                    (rule_idx, start + offset, end + offset, m)
+                    for rule_idx, start, end, m in text_matches
+                    if start + offset >= start_char and end + offset <= end_char
+                )
+            # in the order of a scan of the whole text, by rule and position
+            date_matches.sort(key=lambda match: (match[0], match[1]))
+            ents_to_add = self._date_matches(doc, date_matches, rules, offsets)
+            for start, end in token_windows:
+                ents_to_add.extend(self._duration_matches(doc, rules, start, end))
+
+        ents = [
+            (e.start, e.end, e.label_, e.kb_id_, e, None)
+            for e in doc.ents
+            if e.label_ != self.label
+        ]
+        rows = {}
+        starts, ends, aligned = _align(
+            offsets,
+            [start_char for start_char, _, _, _ in kept],
+            [end_char for _, end_char, _, _ in kept],
+        )
+        for idx, (start_char, end_char, kb_id, row) in enumerate(kept):
+            if not aligned[idx]:
+                self.logger.error(
+                    f"Span could not be retrieved for the kept annotation {kb_id} with "
+                    f"character offsets {(start_char, end_char)}. Skipping it."
+                )
                 continue
+            ents.append((starts[idx], ends[idx], self.label, kb_id, None, None))
+            if row is not None:
+                rows[starts[idx], ends[idx]] = row
+        ents.sort(key=lambda ent: ent[0])
+        return self._commit(doc, ents_to_add, rules, ents, rows)
 
-            # if overlapping entities due to multiple matched date patterns,
-            # keep entity with longest span and dump others
-            if any(t.ent_type for t in doc[span.start : span.end]):
+    def _previous_entities(
+        self, previous: Union[Doc, Iterable[Tuple[int, int, str]]]
+    ) -> List[Tuple[int, int, str, Optional[Tuple[int, int, str]]]]:
+        """
+        Return the entities of this component as (start_char, end_char, kb_id,
+        row) tuples ordered by position, where row is the (type, value, unit) of
+        the structured record or None if not structured.
+        """
+        if not isinstance(previous, Doc):
+            ents = sorted((start, end, kb_id) for start, end, kb_id in previous)
+            if not self.structured:
+                return [(start, end, kb_id, None) for start, end, kb_id in ents]
+            decoded = records.decode_timex3([kb_id for _, _, kb_id in ents]).tolist()
+            return [(*ent, row[2:]) for ent, row in zip(ents, decoded)]
 
-                # Only look for overlaps +- 5 tokens to left and right as there are no
-                # date patterns consisting of more than 5 tokens
-                span_ents = doc[
-                    max(0, span.start - self.MAX_LEN_PATTERN) : min(
-                        span.end + self.MAX_LEN_PATTERN, len(doc)
-                    )
-                ].ents
-                overlap_ents = [
-                    e
-                    for e in span_ents
-                    if span.start_char < e.end_char and span.end_char > e.start_char
-                ]
-                timexy_overlap_ents = [
-                    e for e in overlap_ents if e.label_ == self.label
-                ]
-
-                # If overlapping entities of other label, overwrite
-                # If overlapping entities with timexy label, only overwrite if span is longer than existing
-                if all(len(e) <= len(span) for e in timexy_overlap_ents):
-                    doc.ents = [e for e in doc.ents if e not in overlap_ents] + [span]
-            else:
-                try:
-                    doc.ents += (span,)
-                except Exception:
-                    self.logger.error(
-                        f"Unable to set entity {span.text} with offset ({span.start},{span.end}). Skipping this entity."
-                    )
-                    self.logger.error(traceback.format_exc())
+        rows = {}
+        if self.structured and previous._.timexy is not None:
+            rows = {(row[0], row[1]): row[2:] for row in previous._.timexy.tolist()}
+        ents = []
+        for e in previous.ents:
+            if e.label_ != self.label:
+                continue
+            row = None
+            if self.structured:
+                row = rows.get((e.start, e.end))
+                if row is None:
+                    row = records.decode_timex3([e.kb_id_]).tolist()[0][2:]
+            ents.append((e.start_char, e.end_char, e.kb_id_, row))
+        return ents
 
+    def _annotate(
+        self,
+        doc: Doc,
+        date_matches: List[Tuple[int, int, int, re.Match]],
+        rules: Rules,
+    ) -> Doc:
+        ents_to_add = self._date_matches(
+            doc, date_matches, rules
+        ) + self._duration_matches(doc, rules)
+        if not ents_to_add:
+            return doc
+        return self._commit(doc, ents_to_add, rules)
+
+    def _commit(
+        self,
+        doc: Doc,
+        ents_to_add: List[Candidate],
+        rules: Rules,
+        ents: Optional[List[Tuple[int, int, str, str, Optional[Span], None]]] = None,
+        rows: Optional[Dict[Tuple[int, int], Tuple[int, int, str]]] = None,
+    ) -> Doc:
+        """
+        Merge the matches into the entities, by default the existing entities of
+        the doc, and set the result as entities of the doc. rows are the (type,
+        value, unit) records of given entities of this component by (start, end)
+        token, recorded if the entities are kept (if structured).
+        """
+        stats = rules.stats
+        if self.profile:
+            commit_start = time.perf_counter()
+            # dropped spans per rule, the last entry counts the durations
+            dropped = [0] * (len(stats.rules) + 1)
+            resolved = self._resolve_overlaps(doc, ents_to_add, dropped, ents)
+            for rule_stats, n_dropped in zip(stats.rules + [stats.durations], dropped):
+                rule_stats.dropped += n_dropped
+        else:
+            resolved = self._resolve_overlaps(doc, ents_to_add, ents=ents)
+        if resolved is None:
+            resolved = ents
+        if resolved is not None:
+            # Set all entities at once instead of re-validating them for every span
+            doc.ents = [
+                (
+                    span
+                    if span is not None
+                    else Span(doc, start, end, label=self.label, kb_id=kb_id)
+                )
+                for start, end, label, kb_id, span, _ in resolved
+            ]
+            if self.structured:
+                # the records of the resolved entities of this component
+                rows = rows or {}
+                ent_rows = []
+                for start, end, _, _, _, candidate in resolved:
+                    if candidate is not None:
+                        ent_rows.append(
+                            (
+                                start,
+                                end,
+                                records.DATE if candidate[3] >= 0 else records.DURATION,
+                                candidate[4],
+                                candidate[5],
+                            )
+                        )
+                    elif (start, end) in rows:
+                        ent_rows.append((start, end, *rows[start, end]))
+                doc._.timexy = records.to_records(ent_rows) if ent_rows else None
+        if self.profile:
+            stats.commit_time += time.perf_counter() - commit_start
         return doc
 
-    def _date_matches(self, doc: Doc) -> List[Span]:
-        spans = []
-        for regex in self.date_regexes:
-            for m in regex[0].finditer(doc.text):
-                end_offset = m.span()[1]
-                # if next character is a digit this is likely not a date, skip match
-                if len(doc.text) > end_offset and doc.text[end_offset].isdigit():
-                    continue
-                try:
-                    # convert written months (%b and %B) back to numbers based on
-                    # language class to allow parsing without need to install any locale
-                    datestring, date_format = self._replace_month_str(
-                        m.group(0), regex[1]
-                    )
-                    d = dt.datetime.strptime(datestring, date_format)
-                except Exception:
-                    self.logger.info(
-                        f"Error during parsing of date for match {str(m.group(0))} with character offset {str(m.span())}. Skipping the match."
-                    )
+    def _resolve_overlaps(
+        self,
+        doc: Doc,
+        ents_to_add: List[Candidate],
+        dropped: Optional[List[int]] = None,
+        ents: Optional[List[Tuple[int, int, str, str, Optional[Span], None]]] = None,
+    ) -> Optional[List[Tuple[int, int, str, str, Optional[Span], Optional[Candidate]]]]:
+        """
+        Merge the gathered matches into the existing entities of the doc or the
+        given entities, see Candidate. Returns the resulting entities as (start,
+        end, label, kb_id, span, candidate) tuples ordered by start token, where
+        span is the existing entity span (if any) and candidate the match for new
+        entities, or None if the entities remain unchanged. If given, the spans
+        discarded are counted in dropped per source.
+        """
+        if ents is None:
+            ents = [(e.start, e.end, e.label_, e.kb_id_, e, None) for e in doc.ents]
+        # the current entities by id and the id of the entity covering each token,
+        # entities never overlap, so the overlaps of a span are found token by token
+        # for spans of any length
+        ents_by_id = dict(enumerate(ents))
+        token_ents = {
+            token: ent_id
+            for ent_id, ent in ents_by_id.items()
+            for token in range(ent[0], ent[1])
+        }
+        next_id = len(ents_by_id)
+        changed = False
+
+        for candidate in ents_to_add:
+            start, end, kb_id, source = candidate[:4]
+            overlap_ids = {
+                token_ents[token] for token in range(start, end) if token in token_ents
+            }
+
+            if overlap_ids:
+                overlaps = [ents_by_id[ent_id] for ent_id in overlap_ids]
+                # ignore match if there is an overlapping entity of another type
+                # (unless overwrite) or a longer one of timexy
+                if (
+                    any(ent[2] != self.label for ent in overlaps) and not self.overwrite
+                ) or any(
+                    ent[1] - ent[0] > end - start
+                    for ent in overlaps
+                    if ent[2] == self.label
+                ):
+                    if dropped is not None:
+                        dropped[source] += 1
                     continue
+                # otherwise the match replaces the overlapping entities
+                for ent_id, ent in zip(overlap_ids, overlaps):
+                    if dropped is not None and ent[5] is not None:
+                        dropped[ent[5][3]] += 1
+                    del ents_by_id[ent_id]
+                    for token in range(ent[0], ent[1]):
+                        del token_ents[token]
 
-                span = doc.char_span(
-                    *m.span(),
-                    label=self.label,
-                    kb_id=self._get_date_kb_id(d, self.kb_id_type),
-                )
+            ents_by_id[next_id] = (start, end, self.label, kb_id, None, candidate)
+            for token in range(start, end):
+                token_ents[token] = next_id
+            next_id += 1
+            changed = True
 
-                if span:
-                    spans.append(span)
-                else:
-                    self.logger.error(
-                        f"Span could not be retrieved for annotation of type {self.label} for datestring {datestring} with character offsets {m.span()}. Skipping the match."
-                    )
-        return spans
+        if not changed:
+            return None
+        return sorted(ents_by_id.values(), key=lambda ent: ent[0])
 
-    def _duration_matches(self, doc: Doc) -> List[Span]:
+    def _date_matches(
+        self,
+        doc: Doc,
+        date_matches: List[Tuple[int, int, int, re.Match]],
+        rules: Rules,
+        offsets: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ) -> List[Candidate]:
+        if not date_matches:
+            return []
+        # the token ranges of all matches, looked up once in the token offsets
+        # instead of creating a span per match
+        starts, ends, aligned = _align(
+            _token_offsets(doc) if offsets is None else offsets,
+            [start_offset for _, start_offset, _, _ in date_matches],
+            [end_offset for _, _, end_offset, _ in date_matches],
+        )
         spans = []
-        matches = self.matcher(doc)
-        for match_id, start, end in matches:
-
-            if any(t.ent_type for t in doc[start:end]) and not self.overwrite:
+        for idx, (rule_idx, start_offset, end_offset, m) in enumerate(date_matches):
+            if self.profile:
+                rules.stats.rules[rule_idx].hits += 1
+            # if next character is a digit this is likely not a date, skip match (the
+            # scanned text ends with the doc or a separator)
+            if m.end() < len(m.string) and m.string[m.end()].isdigit():
+                continue
+            normalized = self._normalize_date(rule_idx, m, rules)
+            if normalized is None:
+                if self.profile:
+                    rules.stats.rules[rule_idx].parse_failures += 1
+                self.logger.info(
+                    f"Error during parsing of date for match {str(m.group(0))} with character offset {str((start_offset, end_offset))}. Skipping the match."
+                )
                 continue
 
-            dur_unit = doc.vocab.strings[match_id]
-            cnt_token = Span(doc, start, end)[0]
-            if cnt_token.is_digit:
-                cnt = cnt_token.text
+            if aligned[idx]:
+                kb_id, ordinal = normalized
+                spans.append((starts[idx], ends[idx], kb_id, rule_idx, ordinal, ""))
             else:
-                cnt = self.timexy_lang.num_words.index(cnt_token.text.lower())
-            if cnt:
-                kb_id = self._get_duration_kb_id(cnt, dur_unit)
-                ent = Span(doc, start, end, label=self.label, kb_id=kb_id)
-                spans.append(ent)
+                self.logger.error(
+                    f"Span could not be retrieved for annotation of type {self.label} for datestring {m.group(0)} with character offsets {(start_offset, end_offset)}. Skipping the match."
+                )
         return spans
 
-    def _replace_month_str(self, datestring: str, date_format: str) -> Tuple[str, str]:
+    def _normalize_date(
+        self, rule_idx: int, m: re.Match, rules: Rules
+    ) -> Optional[Tuple[str, int]]:
         """
-        Replace all months strings in the specified datestring with their index
-        (e.g. February --> 2) and return the updated datesting and date_format.
-        The replacement is case-insensitive.
+        Return the kb_id and the ordinal of the date matched by the rule or None
+        if the match is not a valid date. Results are cached by matched text, rule
+        pattern, kb_id_type and scanner.
         """
-        if "%b" in date_format or "%B" in date_format:
-            sorted_month_str_pairs = sorted(
-                self.timexy_lang.get_month_str_pairs(),
-                key=lambda x: len(x[1]),
-                reverse=True,
+        date_scanner = rules.compiled.date_scanner
+        kb_id_cache = self.kb_id_cache
+        if kb_id_cache is not None:
+            # the month table of the scanner may change with the rules
+            key = (
+                m.group(0),
+                date_scanner.patterns[rule_idx],
+                self.kb_id_type,
+                date_scanner,
             )
-            for month_str_pair in sorted_month_str_pairs:
-                if month_str_pair[1].lower() in datestring.lower():
-                    datestring = datestring.lower().replace(
-                        month_str_pair[1].lower(), str(month_str_pair[0])
+            normalized = kb_id_cache.get(key, _MISSING)
+            if normalized is not _MISSING:
+                return normalized
+
+        d = date_scanner.to_date(rule_idx, m)
+        normalized = (
+            None
+            if d is None
+            else (self._get_date_kb_id(d, self.kb_id_type), d.toordinal())
+        )
+
+        if kb_id_cache is not None:
+            kb_id_cache.put(key, normalized)
+        return normalized
+
+    def _duration_matches(
+        self, doc: Doc, rules: Rules, start: int = 0, end: Optional[int] = None
+    ) -> List[Candidate]:
+        """
+        Return the durations of the doc or only of its tokens from start to end.
+        """
+        tokens = doc if end is None else doc[start:end]
+        if self.profile:
+            matcher_start = time.perf_counter()
+            matches = self._match_durations(tokens, rules)
+            rules.stats.matcher_time += time.perf_counter() - matcher_start
+            rules.stats.durations.hits += len(matches)
+        else:
+            matches = self._match_durations(tokens, rules)
+
+        spans = []
+        for token_idx, cnt, dur_unit in matches:
+            normalized = self._normalize_duration(cnt, dur_unit)
+            if normalized is not None:
+                kb_id, cnt = normalized
+                token_idx += start
+                spans.append((token_idx, token_idx + 2, kb_id, -1, cnt, dur_unit))
+        return spans
+
+    def _match_durations(
+        self, doc: Union[Doc, Span], rules: Rules
+    ) -> List[Tuple[int, Union[int, str], str]]:
+        """
+        Return (start token, count, unit) tuples of the two-token durations of the
+        doc or span that do not overlap existing entities (unless overwrite), where count
+        is the digits or the index of the number word.
+        """
+        if len(doc) < 2:
+            return []
+        orths, lowers, is_digits, ent_types = doc.to_array(
+            [ORTH, LOWER, IS_DIGIT, ENT_TYPE]
+        ).T
+        is_digits = is_digits.astype(bool)
+        candidates = np.isin(lowers[1:], rules.unit_lower_hashes) & (
+            is_digits[:-1] | np.isin(lowers[:-1], rules.num_word_hashes)
+        )
+        if not self.overwrite:
+            candidates &= (ent_types[:-1] == 0) & (ent_types[1:] == 0)
+
+        matches = []
+        for start in np.flatnonzero(candidates).tolist():
+            if is_digits[start]:
+                dur_unit = rules.unit_orths.get(orths[start + 1])
+                if dur_unit is not None:
+                    matches.append((start, doc[start].text, dur_unit))
+            else:
+                matches.append(
+                    (
+                        start,
+                        rules.num_word_lowers[lowers[start]],
+                        rules.unit_lowers[lowers[start + 1]],
                     )
-                    date_format = date_format.replace("%b", "%m").replace("%B", "%m")
-                    return datestring, date_format
-        return datestring, date_format
+                )
+        return matches
+
+    def _normalize_duration(
+        self, cnt: Union[int, str], unit: str
+    ) -> Optional[Tuple[str, int]]:
+        """
+        Return the kb_id and the count of the duration with the count given as
+        digits or the index of the number word or None for a count of zero (number
+        word). Results are cached like the dates.
+        """
+        if self.kb_id_cache is not None:
+            key = (cnt, unit, self.kb_id_type)
+            normalized = self.kb_id_cache.get(key, _MISSING)
+            if normalized is not _MISSING:
+                return normalized
+
+        normalized = None
+        if cnt:
+            normalized = (
+                self._get_duration_kb_id(cnt, unit),
+                records.duration_count(cnt) if isinstance(cnt, str) else cnt,
+            )
+
+        if self.kb_id_cache is not None:
+            self.kb_id_cache.put(key, normalized)
+        return normalized
 
     def _get_date_kb_id(self, d: dt.datetime, kb_id_type: str) -> str:
-        if kb_id_type == "timex3":
-            return f'TIMEX3 type="DATE" value="{d.isoformat()}"'
-        elif kb_id_type == "timestamp":
-            return str(d.timestamp())
-        else:
-            raise ValueError(f"Illegal argument for kb_id_type: {kb_id_type}")
+        return util.get_date_kb_id(d, kb_id_type, self.tz)
 
     def _get_duration_kb_id(self, cnt: str, unit: str) -> str:
-        return f'TIMEX3 type="DURATION" value="P{cnt}{unit}"'
+        return util.get_duration_kb_id(cnt, unit)
+
+    def epochs(self, docs: Iterable[Doc]) -> np.ndarray:
+        """
+        Return the dates annotated by this component in the docs as an array of
+        (doc index, start_char, end_char, epoch) rows (see EPOCH_DTYPE), e.g. for
+        analytics over a batch. TIMEX3 dates are converted to timestamps in the
+        configured timezone in bulk with datetime64 arithmetic.
+        """
+        rows: List[Tuple[int, int, int, float]] = []
+        timex3_idxs: List[int] = []
+        timex3_values: List[str] = []
+        for doc_idx, doc in enumerate(docs):
+            for ent in doc.ents:
+                if ent.label_ != self.label:
+                    continue
+                kb_id = ent.kb_id_
+                if kb_id.startswith(_DATE_KB_ID_PREFIX):
+                    timex3_idxs.append(len(rows))
+                    timex3_values.append(kb_id[len(_DATE_KB_ID_PREFIX) : -1])
+                    timestamp = 0.0
+                elif kb_id.startswith("TIMEX3 "):  # durations
+                    continue
+                else:
+                    timestamp = float(kb_id)
+                rows.append((doc_idx, ent.start_char, ent.end_char, timestamp))
+
+        epochs = np.array(rows, dtype=EPOCH_DTYPE)
+        if timex3_values:
+            epochs["epoch"][timex3_idxs] = self._to_epochs(
+                np.array(timex3_values, dtype="datetime64[s]")
+            )
+        return epochs
+
+    def _to_epochs(self, datetimes: np.ndarray) -> np.ndarray:
+        """
+        Convert naive datetime64 values to timestamps in the configured timezone.
+        """
+        seconds = datetimes.astype(np.int64)
+        if self.tz is dt.timezone.utc:
+            return seconds.astype(np.float64)
+        # the UTC offset may differ per date, look it up once per distinct value
+        unique_seconds, inverse = np.unique(seconds, return_inverse=True)
+        unique_epochs = np.array(
+            [
+                util.get_epoch(
+                    dt.datetime(1970, 1, 1) + dt.timedelta(seconds=int(s)), self.tz
+                )
+                for s in unique_seconds
+            ]
+        )
+        return unique_epochs[inverse]
 
     def to_disk(self, path: Union[str, Path], *, exclude: Iterable[str] = []) -> None:
         serialize = OrderedDict()
         serialize["cfg"] = lambda p: srsly.write_json(p, self.cfg)
+        serialize["rules"] = lambda p: srsly.write_json(p, self.compiled.to_table())
 
         util.to_disk(path, serialize, exclude)
 
     def from_disk(
         self, path: Union[str, Path], *, exclude: Iterable[str] = []
     ) -> "Timexy":
-        deserialize = {}
-        deserialize["cfg"] = lambda p: self.cfg.update(_load_cfg(p))
+        deserialize = OrderedDict()
+        deserialize["cfg"] = lambda p: self._apply_cfg({**self.cfg, **_load_cfg(p)})
+        deserialize["rules"] = self._rules_from_disk
 
         util.from_disk(path, deserialize, exclude)
 
         return self
+
+    def _rules_from_disk(self, path: Path) -> None:
+        """
+        Load the compiled rules written by to_disk, components saved by earlier
+        versions keep the built-in rules of the language.
+        """
+        if not path.exists():
+            return
+        table = srsly.read_json(path)
+        timexy_lang = TimexyLanguage.from_table(table["language"])
+        if table.get("version") != registry.TABLE_VERSION:
+            self.logger.warning(
+                f"Compiled rules of version {table.get('version')} in {path} are not "
+                f"supported, compiling the rules again."
+            )
+            table = None
+        with self._rules_lock:
+            self._rules = Rules.create(registry.get_compiled(timexy_lang, table))
+
+
+def _text_len(doc: Doc) -> int:
+    # without joining the texts of all tokens as doc.text does
+    return doc[-1].idx + len(doc[-1].text_with_ws) if len(doc) else 0
+
+
+def _token_offsets(doc: Doc) -> Tuple[np.ndarray, np.ndarray]:
+    # the start and end character offsets of the tokens, both ascending
+    starts, lengths = doc.to_array([IDX, LENGTH]).astype(np.int64).T
+    return starts, starts + lengths
+
+
+def _align(
+    offsets: Tuple[np.ndarray, np.ndarray],
+    start_chars: List[int],
+    end_chars: List[int],
+) -> Tuple[List[int], List[int], List[bool]]:
+    """
+    Return the token ranges of character ranges, looked up by bisection in the
+    token offsets of a doc, and whether each range is aligned with token
+    boundaries. As for doc.char_span, a range is aligned if it starts at the start
+    and ends at the end of a token.
+    """
+    token_starts, token_ends = offsets
+    n_tokens = len(token_starts)
+    if not n_tokens:
+        return [0] * len(start_chars), [0] * len(end_chars), [False] * len(start_chars)
+    start_arr = np.asarray(start_chars, dtype=np.int64)
+    end_arr = np.asarray(end_chars, dtype=np.int64)
+    starts = np.searchsorted(token_starts, start_arr)
+    ends = np.searchsorted(token_ends, end_arr)
+    aligned = (
+        (starts < n_tokens)
+        & (ends < n_tokens)
+        & (starts <= ends)
+        & (token_starts[np.minimum(starts, n_tokens - 1)] == start_arr)
+        & (token_ends[np.minimum(ends, n_tokens - 1)] == end_arr)
+    )
+    return starts.tolist(), (ends + 1).tolist(), aligned.tolist()
+
+
+def _expand(
+    offsets: Tuple[np.ndarray, np.ndarray], start_char: int, end_char: int
+) -> Tuple[int, int]:
+    # the tokens overlapping a character range, including the tokens it starts or
+    # ends in, but not those next to whitespace at its ends
+    token_starts, token_ends = offsets
+    start = int(np.searchsorted(token_ends, start_char, "right"))
+    end = int(np.searchsorted(token_starts, end_char, "left"))
+    return start, max(start, end)
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Merge overlapping and adjacent (start, end) ranges, ordered by start.
+    """
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
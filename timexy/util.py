@@ -1,5 +1,9 @@
+import datetime as dt
+from collections import OrderedDict
 from pathlib import Path
-from typing import Callable, Dict, Iterable, Union
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Union
+
+_EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
 
 
 def ensure_path(path: Union[str, Path]) -> Path:
@@ -42,3 +46,101 @@ def parse_timex3(timex3str: str) -> Dict:
         e.split("=")[0]: e.split("=")[1]
         for e in timex3str[len("TIMEX3 ") :].replace('"', "").split()
     }
+
+
+def get_timezone(name: str) -> Optional[dt.tzinfo]:
+    """
+    Return the timezone for "UTC", "local" (None, the timezone of the process) or
+    an IANA timezone name such as "Europe/Berlin".
+    """
+    if name == "UTC":
+        return dt.timezone.utc
+    if name == "local":
+        return None
+    try:
+        from zoneinfo import ZoneInfo
+    except ImportError:
+        # Python < 3.9
+        from backports.zoneinfo import ZoneInfo
+    try:
+        return ZoneInfo(name)
+    except (KeyError, ValueError):
+        raise ValueError(f"Illegal argument for timezone: {name}")
+
+
+def get_epoch(d: dt.datetime, tz: Optional[dt.tzinfo] = dt.timezone.utc) -> float:
+    """
+    Return the POSIX timestamp of the naive datetime in the timezone (the local
+    timezone of the process if None). Computed from the date ordinal, which
+    avoids the system timezone lookup of datetime.timestamp.
+    """
+    if tz is None:
+        return d.timestamp()
+    offset = tz.utcoffset(d)
+    return float(
+        (d.toordinal() - _EPOCH_ORDINAL) * 86400
+        + d.hour * 3600
+        + d.minute * 60
+        + d.second
+        - (offset.days * 86400 + offset.seconds if offset else 0)
+    )
+
+
+def get_date_kb_id(
+    d: dt.datetime, kb_id_type: str, tz: Optional[dt.tzinfo] = dt.timezone.utc
+) -> str:
+    if kb_id_type == "timex3":
+        return f'TIMEX3 type="DATE" value="{d.isoformat()}"'
+    elif kb_id_type == "timestamp":
+        return str(get_epoch(d, tz))
+    else:
+        raise ValueError(f"Illegal argument for kb_id_type: {kb_id_type}")
+
+
+def get_duration_kb_id(cnt: Union[int, str], unit: str) -> str:
+    return f'TIMEX3 type="DURATION" value="P{cnt}{unit}"'
+
+
+class LRUCache:
+    """
+    Bounded mapping that evicts the least recently used entry when full and
+    counts the hits and misses of its lookups.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "maxsize": self.maxsize,
+            "currsize": len(self._data),
+        }